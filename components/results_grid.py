@@ -0,0 +1,193 @@
+import queue
+import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+from PIL import Image, ImageTk
+from utils.image_classifier.config import (
+    RESULTS_THUMBNAIL_SIZE,
+    RESULTS_THUMBNAIL_CACHE_SIZE,
+    RESULTS_THUMBNAIL_WORKERS,
+    RESULTS_MAX_ROWS_PER_TICK,
+)
+
+_SKIPPED = object()  # Miniatura nie została zdekodowana, bo wiersz zniknął z widoku
+
+
+def load_thumbnail(image_path, size=RESULTS_THUMBNAIL_SIZE):
+    """
+    Dekoduje obraz w zmniejszonej rozdzielczości (JPEG: `draft`, pozostałe: `reduce`) i zwraca miniaturę RGB.
+    """
+    with Image.open(image_path) as image:
+        if image.format == "JPEG":
+            image.draft("RGB", (size, size))
+        image.thumbnail((size, size), Image.BILINEAR, reducing_gap=2.0)
+        return image.convert("RGB")
+
+
+class ResultsGrid(tk.Frame):
+    """
+    Lista wyników klasyfikacji z miniaturami, wirtualizowana na płótnie (Canvas).
+
+    Rysowane są tylko wiersze widoczne w oknie, więc przewijanie nie zależy od liczby wyników.
+    Miniatury dekodowane są w tle (pula wątków) i trzymane w ograniczonej pamięci LRU;
+    obraz, który przed dekodowaniem zniknął z widoku, jest pomijany. Wyniki można dodawać
+    z dowolnego wątku (`add_result`) - trafiają do kolejki odczytywanej przez `after`.
+    """
+
+    def __init__(self, parent, thumbnail_size=RESULTS_THUMBNAIL_SIZE, cache_size=RESULTS_THUMBNAIL_CACHE_SIZE,
+                 workers=RESULTS_THUMBNAIL_WORKERS, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.thumbnail_size = thumbnail_size
+        self.cache_size = cache_size
+        self.row_height = thumbnail_size + 8
+
+        self.rows = []  # (nazwa, etykieta, ścieżka)
+        self.first_row = 0
+        self.follow = True  # Czy pokazywać najnowsze wyniki (dopóki użytkownik nie przewinie w górę)
+
+        self.canvas = tk.Canvas(self, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self._incoming = queue.Queue()
+        self._decoded = queue.Queue()
+        self._thumbnails = OrderedDict()  # ścieżka -> PhotoImage (None, gdy obrazu nie da się odczytać)
+        self._pending = set()
+        self._wanted = frozenset()
+        self._render_scheduled = False
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+        self.canvas.bind("<Configure>", lambda event: self.schedule_render())
+        self.canvas.bind("<Enter>", lambda event: self.canvas.focus_set())
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_rows(3))
+        self.canvas.bind("<Prior>", lambda event: self.scroll_rows(-self.visible_rows()))
+        self.canvas.bind("<Next>", lambda event: self.scroll_rows(self.visible_rows()))
+        self.canvas.bind("<Destroy>", lambda event: self._executor.shutdown(wait=False, cancel_futures=True))
+
+        self.after(100, self._process_queues)
+
+    def add_result(self, name, label, image_path):
+        """
+        Dodaje wynik do listy. Bezpieczne do wywołania z wątku klasyfikacji.
+        """
+        self._incoming.put((name, label, image_path))
+
+    def clear(self):
+        """
+        Usuwa wszystkie wiersze; zdekodowane miniatury zostają w pamięci podręcznej.
+        """
+        while not self._incoming.empty():
+            self._incoming.get_nowait()
+        self.rows = []
+        self.first_row = 0
+        self.follow = True
+        self.schedule_render()
+
+    def visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.row_height + 1)
+
+    def scroll_rows(self, delta):
+        self._scroll_to(self.first_row + delta)
+
+    def _scroll_to(self, first_row):
+        last_start = max(0, len(self.rows) - self.visible_rows() + 1)
+        self.first_row = max(0, min(int(first_row), last_start))
+        self.follow = self.first_row >= last_start
+        self.schedule_render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._scroll_to(float(amount) * len(self.rows))
+        elif unit == "pages":
+            self.scroll_rows(int(amount) * self.visible_rows())
+        else:
+            self.scroll_rows(int(amount))
+
+    def _on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def schedule_render(self):
+        # Wiele zdarzeń przewijania między odświeżeniami ekranu daje jedno rysowanie
+        if not self._render_scheduled:
+            self._render_scheduled = True
+            self.after_idle(self._render)
+
+    def _render(self):
+        self._render_scheduled = False
+        visible = self.visible_rows()
+        if self.follow:
+            self.first_row = max(0, len(self.rows) - visible + 1)
+        end = min(len(self.rows), self.first_row + visible)
+
+        # Zbiór widocznych ścieżek musi być gotowy przed zleceniem dekodowania - wątek
+        # dekodujący pomija miniatury spoza niego
+        self._wanted = frozenset(self.rows[index][2] for index in range(self.first_row, end))
+
+        self.canvas.delete("all")
+        text_x = self.thumbnail_size + 16
+        for index in range(self.first_row, end):
+            name, label, image_path = self.rows[index]
+            y = (index - self.first_row) * self.row_height + 4
+
+            if image_path in self._thumbnails:
+                self._thumbnails.move_to_end(image_path)
+                photo = self._thumbnails[image_path]
+            else:
+                photo = None
+                self._request_thumbnail(image_path)
+
+            if photo is not None:
+                self.canvas.create_image(4, y, image=photo, anchor=tk.NW)
+            else:
+                self.canvas.create_rectangle(4, y, 4 + self.thumbnail_size, y + self.thumbnail_size, outline="gray")
+            self.canvas.create_text(text_x, y + self.thumbnail_size // 2, text=f"{name}\n{label}", anchor=tk.W)
+
+        if self.rows:
+            self.scrollbar.set(self.first_row / len(self.rows), end / len(self.rows))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _request_thumbnail(self, image_path):
+        if image_path in self._pending:
+            return
+        self._pending.add(image_path)
+        self._executor.submit(self._decode_thumbnail, image_path)
+
+    def _decode_thumbnail(self, image_path):
+        if image_path not in self._wanted:
+            self._decoded.put((image_path, _SKIPPED))
+            return
+        try:
+            self._decoded.put((image_path, load_thumbnail(image_path, self.thumbnail_size)))
+        except Exception:
+            self._decoded.put((image_path, None))
+
+    def _process_queues(self):
+        changed = False
+
+        received = 0
+        while received < RESULTS_MAX_ROWS_PER_TICK and not self._incoming.empty():
+            self.rows.append(self._incoming.get_nowait())
+            received += 1
+        changed |= received > 0
+
+        while not self._decoded.empty():
+            image_path, image = self._decoded.get_nowait()
+            self._pending.discard(image_path)
+            if image is _SKIPPED:
+                # Wiersz mógł wrócić do widoku w trakcie - ponowne rysowanie zleci dekodowanie
+                changed |= image_path in self._wanted
+                continue
+            # PhotoImage można tworzyć tylko w wątku interfejsu
+            self._thumbnails[image_path] = ImageTk.PhotoImage(image) if image is not None else None
+            while len(self._thumbnails) > self.cache_size:
+                self._thumbnails.popitem(last=False)
+            changed |= image_path in self._wanted
+
+        if changed:
+            self.schedule_render()
+        self.after(100, self._process_queues)
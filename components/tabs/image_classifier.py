@@ -1,7 +1,12 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
+from components.results_grid import ResultsGrid
 from utils.image_classifier.classifier import process_images
+from utils.image_classifier.embeddings import similar_images
+from utils.image_classifier.model_loader import model_registry
+from utils.image_classifier.config import MODEL_WARMUP_ON_START, CLASSIFICATION_WORKERS
 import threading
+import os
 
 class ImageClassifierTab(tk.Frame):
     def __init__(self, parent, *args, **kwargs):
@@ -33,6 +38,10 @@ class ImageClassifierTab(tk.Frame):
             self.dynamic_frame, text="Wybierz folder z obrazami", command=self.browse_folder
         )
         self.folder_path_label = tk.Label(self.dynamic_frame, text="Nie wybrano folderu", fg="gray")
+        self.recursive = tk.BooleanVar(value=False)
+        self.recursive_check = tk.Checkbutton(
+            self.dynamic_frame, text="Uwzględnij podfoldery", variable=self.recursive
+        )
 
         self.output_button = tk.Button(
             self, text="Wybierz plik wynikowy", command=self.browse_output_file
@@ -42,17 +51,49 @@ class ImageClassifierTab(tk.Frame):
         self.output_path_label = tk.Label(self, text="Nie wybrano pliku", fg="gray")
         self.output_path_label.pack(pady=5)
 
+        self.workers_frame = tk.Frame(self)
+        self.workers_frame.pack(pady=5)
+        tk.Label(self.workers_frame, text="Liczba procesów:").pack(side=tk.LEFT, padx=5)
+        self.workers = tk.IntVar(value=CLASSIFICATION_WORKERS)
+        self.workers_spinbox = tk.Spinbox(
+            self.workers_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.workers, width=5
+        )
+        self.workers_spinbox.pack(side=tk.LEFT)
+
+        self.resume = tk.BooleanVar(value=False)
+        self.resume_check = tk.Checkbutton(
+            self, text="Wznów przerwaną klasyfikację (pomiń obrazy już zapisane w pliku)", variable=self.resume
+        )
+        self.resume_check.pack(pady=5)
+
+        self.save_embeddings = tk.BooleanVar(value=False)
+        self.embeddings_check = tk.Checkbutton(
+            self, text="Zapisz osadzenia obrazów (wyszukiwanie podobnych)", variable=self.save_embeddings
+        )
+        self.embeddings_check.pack(pady=5)
+
         self.classify_button = tk.Button(
             self, text="Klasyfikuj obrazy", command=self.start_classification, bg="green", fg="black"
         )
         self.classify_button.pack(pady=20)
 
+        self.similar_button = tk.Button(
+            self, text="Znajdź podobne obrazy", command=self.start_similar_search
+        )
+        self.similar_button.pack(pady=5)
+
+        self.results_grid = ResultsGrid(self)
+        self.results_grid.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
         self.file_paths = None
         self.folder_path = None
         self.output_path = None
 
         self.update_mode()
 
+        if MODEL_WARMUP_ON_START:
+            model_registry.warm_up()
+
     def update_mode(self):
         """
         Aktualizuje widoczność elementów GUI w zależności od wybranego trybu.
@@ -66,13 +107,14 @@ class ImageClassifierTab(tk.Frame):
         elif self.mode.get() == "folder":
             self.folder_button.pack(pady=5)
             self.folder_path_label.pack(pady=5)
+            self.recursive_check.pack(pady=5)
 
     def browse_files(self):
         """
         Otwiera eksplorator plików do wyboru obrazów (dla trybu manual).
         """
         file_paths = filedialog.askopenfilenames(
-            filetypes=[("Obrazy", "*.png *.jpg *.jpeg *.tiff *.tif *.bmp"), ("Wszystkie pliki", "*.*")]
+            filetypes=[("Obrazy", "*.png *.jpg *.jpeg *.tiff *.tif *.bmp *.webp"), ("Wszystkie pliki", "*.*")]
         )
         if file_paths:
             self.file_paths = list(file_paths)  # Konwersja krotki na listę
@@ -95,7 +137,10 @@ class ImageClassifierTab(tk.Frame):
         """
         Otwiera eksplorator plików do wyboru pliku wynikowego.
         """
-        file_path = filedialog.asksaveasfilename(defaultextension=".txt")
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[("Pliki tekstowe", "*.txt"), ("CSV", "*.csv"), ("JSON Lines", "*.jsonl")]
+        )
         if file_path:
             self.output_path = file_path
             self.output_path_label.config(text=f"Wybrano plik: {file_path}", fg="black")
@@ -116,6 +161,7 @@ class ImageClassifierTab(tk.Frame):
             messagebox.showerror("Błąd", "Proszę wybrać plik wynikowy.")
             return
 
+        self.results_grid.clear()
         threading.Thread(target=self.classify_images).start()
 
     def classify_images(self):
@@ -123,11 +169,51 @@ class ImageClassifierTab(tk.Frame):
         Wykonuje klasyfikację obrazów w zależności od wybranego trybu.
         """
         try:
+            options = {
+                "workers": max(1, self.workers.get()),
+                "resume": self.resume.get(),
+                "on_result": self.results_grid.add_result,
+            }
+            if self.save_embeddings.get():
+                options["embeddings_dir"] = self.embeddings_dir()
+
             if self.mode.get() == "manual":
-                process_images(self.file_paths, self.output_path)
+                process_images(self.file_paths, self.output_path, **options)
             elif self.mode.get() == "folder":
-                process_images(self.folder_path, self.output_path)
+                process_images(self.folder_path, self.output_path, recursive=self.recursive.get(), **options)
 
             messagebox.showinfo("Sukces", "Klasyfikacja zakończona pomyślnie! Wyniki zapisano do pliku.")
+        except Exception as e:
+            messagebox.showerror("Błąd", str(e))
+
+    def embeddings_dir(self):
+        """
+        Katalog osadzeń powiązany z wybranym plikiem wynikowym.
+        """
+        return f"{self.output_path}.embeddings" if self.output_path else None
+
+    def start_similar_search(self):
+        """
+        Wyszukuje w osobnym wątku obrazy podobne do wybranego, na podstawie zapisanych osadzeń.
+        """
+        directory = self.embeddings_dir()
+        if not directory or not os.path.isdir(directory):
+            directory = filedialog.askdirectory(title="Wybierz katalog z osadzeniami")
+            if not directory:
+                return
+
+        image_path = filedialog.askopenfilename(
+            filetypes=[("Obrazy", "*.png *.jpg *.jpeg *.tiff *.tif *.bmp *.webp"), ("Wszystkie pliki", "*.*")]
+        )
+        if not image_path:
+            return
+
+        threading.Thread(target=self.find_similar, args=(directory, image_path)).start()
+
+    def find_similar(self, directory, image_path):
+        try:
+            matches = similar_images(directory, image_path, k=10)
+            lines = [f"{score:.3f}  {image_id}" for image_id, score in matches]
+            messagebox.showinfo("Podobne obrazy", "\n".join(lines) or "Brak wyników.")
         except Exception as e:
             messagebox.showerror("Błąd", str(e))
\ No newline at end of file
@@ -1,7 +1,10 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from utils.text_extractor.document_processor import DocumentProcessor
+from utils.text_extractor.extractors.ocr_preprocessing import PREPROCESS_STEPS
+from utils.text_extractor.config import EXTRACTION_WORKERS, OCR_PREPROCESS_STEPS, OCR_PREPROCESS_COMPARE
 import threading
+import os
 
 class TextExtractorTab(tk.Frame):
     def __init__(self, parent, *args, **kwargs):
@@ -27,11 +30,35 @@ class TextExtractorTab(tk.Frame):
         self.output_path_label = tk.Label(self, text="Nie wybrano katalogu", fg="gray")
         self.output_path_label.pack(pady=5)
 
+        self.workers_frame = tk.Frame(self)
+        self.workers_frame.pack(pady=5)
+        tk.Label(self.workers_frame, text="Liczba procesów:").pack(side=tk.LEFT, padx=5)
+        self.workers = tk.IntVar(value=EXTRACTION_WORKERS)
+        self.workers_spinbox = tk.Spinbox(
+            self.workers_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.workers, width=5
+        )
+        self.workers_spinbox.pack(side=tk.LEFT)
+
+        self.ocr_preprocess = tk.BooleanVar(value=bool(OCR_PREPROCESS_STEPS))
+        self.ocr_preprocess_check = tk.Checkbutton(
+            self, text="Przetwarzanie wstępne obrazów przed OCR", variable=self.ocr_preprocess
+        )
+        self.ocr_preprocess_check.pack(pady=2)
+
+        self.ocr_compare = tk.BooleanVar(value=OCR_PREPROCESS_COMPARE)
+        self.ocr_compare_check = tk.Checkbutton(
+            self, text="Porównaj z OCR bez przetwarzania (wolniej)", variable=self.ocr_compare
+        )
+        self.ocr_compare_check.pack(pady=2)
+
         self.process_button = tk.Button(
             self, text="Przetwarzaj", command=self.start_processing, bg="green", fg="black"
         )
         self.process_button.pack(pady=20)
 
+        self.status_label = tk.Label(self, text="", fg="gray")
+        self.status_label.pack(pady=5)
+
         self.input_files = None
         self.output_dir = None
 
@@ -73,16 +100,27 @@ class TextExtractorTab(tk.Frame):
             messagebox.showerror("Błąd", "Proszę wybrać pliki wejściowe i katalog wyjściowy.")
             return
 
-        self.processor = DocumentProcessor(output_dir=self.output_dir)
+        self.processor = DocumentProcessor(
+            output_dir=self.output_dir,
+            on_progress=self.show_progress,
+            ocr_preprocess=(OCR_PREPROCESS_STEPS or PREPROCESS_STEPS) if self.ocr_preprocess.get() else (),
+            ocr_compare=self.ocr_compare.get(),
+        )
         threading.Thread(target=self.process_files).start()
 
+    def show_progress(self, file_path, done, total):
+        """
+        Wyświetla postęp przetwarzania stron dokumentu (wywoływana z wątku przetwarzania).
+        """
+        text = f"{os.path.basename(file_path)}: strona {done} z {total}"
+        self.after(0, lambda: self.status_label.config(text=text))
+
     def process_files(self):
         """
         Przetwarza wybrane pliki i generuje raporty.
         """
         try:
-            for file_path in self.input_files:
-                self.processor.process_file(file_path)
+            self.processor.process_files(self.input_files, workers=max(1, self.workers.get()))
 
             self.processor.generate_report_file()
 
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from utils.image_classifier.config import FAST_PREPROCESS_TOLERANCE
+from utils.image_classifier.preprocessing import FastPreprocessor, compare_with_processor
+
+# Dokładność float32 po normalizacji, gdy obie ścieżki skalują ten sam obraz tym samym filtrem
+EXACT_TOLERANCE = 1e-5
+
+
+@pytest.fixture(scope="module")
+def feature_extractor():
+    return transformers.ViTImageProcessor(size={"height": 32, "width": 32})
+
+
+def _smooth_image(width, height, cells=8, seed=0):
+    # Gładki obraz (powiększony szum) zamiast czystego szumu, podobnie jak zdjęcie
+    rng = np.random.default_rng(seed)
+    noise = (rng.random((cells, cells, 3)) * 255).astype(np.uint8)
+    return Image.fromarray(noise).resize((width, height), Image.BICUBIC)
+
+
+@pytest.mark.parametrize("name, mode, size", [
+    ("rgb.png", "RGB", (47, 33)),
+    ("gray.png", "L", (50, 61)),
+    ("alpha.png", "RGBA", (31, 29)),
+    ("odd.bmp", "RGB", (63, 17)),
+    ("small.jpg", "RGB", (40, 40)),
+])
+def test_matches_processor_without_reduction(tmp_path, feature_extractor, name, mode, size):
+    path = tmp_path / name
+    _smooth_image(*size).convert(mode).save(path)
+
+    result = compare_with_processor([str(path)], feature_extractor)
+
+    assert result["max_abs"] <= EXACT_TOLERANCE
+
+
+@pytest.mark.parametrize("name, size", [
+    ("large.png", (1200, 900)),
+    ("large.jpg", (1203, 901)),
+    ("tall.webp", (700, 1000)),
+    ("odd.tiff", (301, 203)),
+])
+def test_matches_processor_with_reduced_decode(tmp_path, feature_extractor, name, size):
+    path = tmp_path / name
+    _smooth_image(*size).save(path)
+
+    result = compare_with_processor([str(path)], feature_extractor)
+
+    assert result["max_abs"] <= FAST_PREPROCESS_TOLERANCE
+    assert result["within_tolerance"]
+
+
+def test_collate_shape_and_dtype(tmp_path, feature_extractor):
+    paths = []
+    for index, size in enumerate([(40, 30), (500, 400)]):
+        path = tmp_path / f"image_{index}.png"
+        _smooth_image(*size, seed=index).save(path)
+        paths.append(str(path))
+
+    preprocessor = FastPreprocessor(feature_extractor)
+    batch = preprocessor.collate([preprocessor.decode(path) for path in paths])
+    reference = feature_extractor(images=[Image.open(path).convert("RGB") for path in paths],
+                                  return_tensors="pt")["pixel_values"]
+
+    assert batch.shape == reference.shape
+    assert batch.dtype == reference.dtype
@@ -0,0 +1,205 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+import torch
+from utils.image_classifier.config import (
+    MODEL_NAME,
+    BACKEND_AGREEMENT_SAMPLES,
+    BACKEND_MIN_AGREEMENT,
+    AUTOTUNE_PATH,
+    AUTOTUNE_BATCH_SIZES,
+    AUTOTUNE_SECONDS_PER_CANDIDATE,
+)
+
+
+def host_key(model_name=MODEL_NAME):
+    return f"{socket.gethostname()}|{model_name}"
+
+def thread_candidates(cpu_count=None):
+    """
+    Liczby wątków do sprawdzenia: wszystkie rdzenie oraz kolejne połowy (do 1).
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    candidates = []
+    threads = cpu_count
+    while threads >= 1:
+        candidates.append(threads)
+        threads //= 2
+    return candidates
+
+def available_backends():
+    from utils.image_classifier.backends import cpu_supports_bf16
+
+    backends = ["eager", "quantized"]
+    if cpu_supports_bf16():
+        backends.append("bf16")
+    try:
+        import onnxruntime  # noqa: F401
+        backends.append("onnx")
+    except ImportError:
+        pass
+    return backends
+
+def _measure(model, batch_size, seconds, input_size=(224, 224)):
+    pixel_values = torch.rand(batch_size, 3, *input_size) * 2 - 1
+    with torch.inference_mode():
+        model(pixel_values=pixel_values)  # rozgrzewka
+
+        images = 0
+        start = time.perf_counter()
+        while True:
+            model(pixel_values=pixel_values)
+            images += batch_size
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds:
+                return images / elapsed
+
+def _benchmark_process(backend, inter_op_threads, batch_sizes, intra_op_candidates, seconds, model_name,
+                       sample_images):
+    # Liczbę wątków inter-op można ustawić tylko raz, przed pierwszym użyciem torch w procesie
+    torch.set_num_interop_threads(inter_op_threads)
+
+    from utils.image_classifier.backends import get_backend, measure_agreement, _input_size
+    from utils.image_classifier.model_loader import get_model
+
+    eager_model, feature_extractor = get_model(model_name)
+    model = get_backend(backend, model_name, sample_images)
+    agreement = measure_agreement(model, eager_model, feature_extractor, sample_images)
+    results = []
+    for intra_op_threads in intra_op_candidates:
+        torch.set_num_threads(intra_op_threads)
+        for batch_size in batch_sizes:
+            results.append({
+                "backend": backend,
+                "inter_op_threads": inter_op_threads,
+                "intra_op_threads": intra_op_threads,
+                "batch_size": batch_size,
+                "images_per_second": _measure(model, batch_size, seconds, _input_size(feature_extractor)),
+                "agreement": agreement,
+            })
+    return results
+
+def is_accurate(measurement, min_agreement=BACKEND_MIN_AGREEMENT):
+    """
+    Czy pomiar może zostać wybrany: silnik "eager" zawsze, pozostałe tylko ze zgodnością
+    top-1 z modelem eager (na prawdziwych obrazach) nie niższą niż `min_agreement`.
+    """
+    if measurement["backend"] == "eager":
+        return True
+    return measurement.get("agreement") is not None and measurement["agreement"] >= min_agreement
+
+def autotune(model_name=MODEL_NAME, backends=None, batch_sizes=AUTOTUNE_BATCH_SIZES, intra_op_candidates=None,
+             inter_op_candidates=(1, 2), seconds=AUTOTUNE_SECONDS_PER_CANDIDATE, path=AUTOTUNE_PATH,
+             sample_images=None):
+    """
+    Mierzy przepustowość (obrazy/s) dla kombinacji silnika, rozmiaru partii i liczby wątków,
+    po czym zapisuje najszybszą konfigurację dla tego hosta i modelu.
+
+    Wybierane są tylko silniki, których zgodność top-1 z modelem eager na obrazach
+    `sample_images` (domyślnie z `BACKEND_AGREEMENT_IMAGES`) jest wystarczająca - bez
+    obrazów próbnych zgodności nie da się sprawdzić i wybierany jest silnik "eager".
+
+    Każda para (silnik, wątki inter-op) jest mierzona w osobnym procesie, ponieważ
+    liczby wątków inter-op nie da się zmienić po uruchomieniu obliczeń torch.
+
+    Returns:
+        dict: Najlepsza konfiguracja wraz z listą wszystkich pomiarów (`measurements`).
+    """
+    from utils.image_classifier.backends import agreement_images
+
+    backends = backends or available_backends()
+    sample_images = sample_images or agreement_images()
+    intra_op_candidates = intra_op_candidates or thread_candidates()
+    context = multiprocessing.get_context("spawn")
+
+    measurements = []
+    for backend in backends:
+        for inter_op_threads in inter_op_candidates:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                try:
+                    measurements.extend(executor.submit(
+                        _benchmark_process, backend, inter_op_threads, list(batch_sizes),
+                        list(intra_op_candidates), seconds, model_name, sample_images,
+                    ).result())
+                except Exception as e:
+                    print(f"Pominięto silnik '{backend}' (inter-op {inter_op_threads}): {e}")
+
+    if not measurements:
+        raise RuntimeError("Nie udało się zmierzyć żadnej konfiguracji.")
+
+    for backend in sorted({entry["backend"] for entry in measurements if not is_accurate(entry)}):
+        print(f"Silnik '{backend}' pominięto przy wyborze: zgodność z modelem eager niesprawdzona lub zbyt niska.")
+    candidates = [entry for entry in measurements if is_accurate(entry)]
+    if not candidates:
+        raise RuntimeError("Żaden silnik nie osiągnął wymaganej zgodności z modelem eager.")
+
+    best = dict(max(candidates, key=lambda entry: entry["images_per_second"]))
+    best["measured"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    save_settings(best, model_name, path)
+    return {**best, "measurements": measurements}
+
+def load_all_settings(path=AUTOTUNE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_settings(settings, model_name=MODEL_NAME, path=AUTOTUNE_PATH):
+    all_settings = load_all_settings(path)
+    all_settings[host_key(model_name)] = settings
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(all_settings, f, indent=2)
+    os.replace(temp_path, path)
+
+def tuned_settings(model_name=MODEL_NAME, path=AUTOTUNE_PATH):
+    """
+    Zwraca zapisaną najlepszą konfigurację dla tego hosta i modelu albo None.
+    """
+    try:
+        return load_all_settings(path).get(host_key(model_name))
+    except (OSError, ValueError):
+        return None
+
+def apply_thread_settings(settings):
+    """
+    Ustawia liczby wątków torch z konfiguracji. Wątki inter-op można zmienić tylko
+    przed pierwszymi obliczeniami w procesie - później zostają bez zmian.
+    """
+    torch.set_num_threads(settings["intra_op_threads"])
+    try:
+        torch.set_num_interop_threads(settings["inter_op_threads"])
+    except RuntimeError:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Strojenie rozmiaru partii, wątków i silnika klasyfikatora obrazów.")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backends", nargs="+", help="Domyślnie: wszystkie dostępne")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=list(AUTOTUNE_BATCH_SIZES))
+    parser.add_argument("--threads", nargs="+", type=int, help="Liczby wątków intra-op do sprawdzenia")
+    parser.add_argument("--inter-op-threads", nargs="+", type=int, default=[1, 2])
+    parser.add_argument("--seconds", type=float, default=AUTOTUNE_SECONDS_PER_CANDIDATE)
+    parser.add_argument("--images", help="Folder z obrazami do sprawdzenia zgodności silników z modelem eager")
+    args = parser.parse_args()
+
+    sample_images = None
+    if args.images:
+        from utils.image_classifier.discovery import iter_image_files
+
+        sample_images = list(iter_image_files(args.images))[:BACKEND_AGREEMENT_SAMPLES]
+
+    result = autotune(args.model, args.backends, args.batch_sizes, args.threads, args.inter_op_threads, args.seconds,
+                      sample_images=sample_images)
+    for entry in sorted(result["measurements"], key=lambda e: -e["images_per_second"]):
+        agreement = "-" if entry["agreement"] is None else f"{entry['agreement']:.0%}"
+        print(f"{entry['backend']:>9}  partia {entry['batch_size']:>3}  intra {entry['intra_op_threads']:>3}  "
+              f"inter {entry['inter_op_threads']}  {entry['images_per_second']:.1f} obrazów/s  zgodność {agreement}")
+    print(f"Zapisano najlepszą konfigurację: {result['backend']}, partia {result['batch_size']}, "
+          f"wątki {result['intra_op_threads']}/{result['inter_op_threads']}")
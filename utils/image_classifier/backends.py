@@ -0,0 +1,235 @@
+import os
+import tempfile
+import threading
+from itertools import islice
+from types import SimpleNamespace
+import torch
+from PIL import Image, UnidentifiedImageError
+from utils.image_classifier.discovery import iter_image_files
+from utils.image_classifier.model_loader import get_model, model_registry
+from utils.image_classifier.config import (
+    MODEL_NAME,
+    INFERENCE_BACKEND,
+    CACHE_DIR,
+    BACKEND_AGREEMENT_SAMPLES,
+    BACKEND_AGREEMENT_IMAGES,
+    BACKEND_MIN_AGREEMENT,
+    BF16_COMPILE,
+    BF16_WARMUP_STEPS,
+)
+
+BACKENDS = ("eager", "quantized", "onnx", "bf16")
+
+_lock = threading.Lock()
+
+
+class OnnxModel:
+    """
+    Model ONNX uruchamiany przez ONNX Runtime, z interfejsem zgodnym z modelem PyTorch
+    (`model(pixel_values=...).logits`, `model.config.id2label`).
+    """
+
+    def __init__(self, onnx_path, config):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("Silnik 'onnx' wymaga pakietu onnxruntime (pip install onnxruntime).")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.config = config
+
+    def __call__(self, pixel_values):
+        logits = self.session.run(["logits"], {"pixel_values": pixel_values.numpy()})[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+
+class Bf16Model:
+    """
+    Model PyTorch uruchamiany w trybie autocast bfloat16 na CPU (jednostki AVX-512 BF16 / AMX),
+    z wejściem w układzie channels_last i opcjonalnie skompilowany przez `torch.compile`.
+    Logity zwracane są jako float32. Wagi modelu (współdzielonego z `model_registry`) nie są zmieniane.
+    """
+
+    def __init__(self, model, compile=BF16_COMPILE):
+        self.config = model.config
+        self.compiled = compile
+        self._forward = torch.compile(model) if compile else model
+
+    def __call__(self, pixel_values):
+        pixel_values = pixel_values.contiguous(memory_format=torch.channels_last)
+        with torch.inference_mode(), torch.autocast("cpu", dtype=torch.bfloat16):
+            logits = self._forward(pixel_values=pixel_values).logits
+        return SimpleNamespace(logits=logits.float())
+
+    def warm_up(self, pixel_values, steps=BF16_WARMUP_STEPS):
+        # Pierwsze przebiegi kompilują graf i dobierają kernele oneDNN
+        for _ in range(steps):
+            self(pixel_values)
+
+
+def cpu_supports_bf16():
+    """
+    Czy procesor ma natywne instrukcje bfloat16 (bez nich autocast bf16 jest wolniejszy od fp32).
+    """
+    try:
+        return bool(torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+def _artifact_path(model, model_name, suffix):
+    # Artefakt zależy od wersji wag i bibliotek eksportujących, nie tylko od nazwy modelu
+    import transformers
+    revision = getattr(model.config, "_commit_hash", None) or "local"
+    versions = f"torch{torch.__version__.split('+')[0]}-transformers{transformers.__version__}"
+    return os.path.join(CACHE_DIR, "backends", f"{model_name.replace('/', '--')}-{revision[:12]}-{versions}{suffix}")
+
+def _input_size(feature_extractor):
+    size = getattr(feature_extractor, "size", None) or {}
+    return size.get("height", 224), size.get("width", 224)
+
+def _build_quantized(model):
+    # Dynamiczna kwantyzacja trwa ułamek sekundy, więc nie zapisujemy jej wyniku na dysk
+    quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    quantized.eval()
+    return quantized
+
+def _build_onnx(model, model_name, feature_extractor):
+    path = _artifact_path(model, model_name, ".onnx")
+    if not os.path.exists(path):
+        height, width = _input_size(feature_extractor)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unikalny plik tymczasowy: procesy robocze mogą eksportować ten sam model jednocześnie,
+        # a os.replace publikuje tylko kompletny plik
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".onnx.tmp")
+        os.close(fd)
+        try:
+            with torch.inference_mode():
+                torch.onnx.export(
+                    model,
+                    (torch.zeros(1, 3, height, width),),
+                    temp_path,
+                    input_names=["pixel_values"],
+                    output_names=["logits"],
+                    dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+                    opset_version=17,
+                )
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return OnnxModel(path, model.config)
+
+def _build_bf16(model, feature_extractor):
+    if not cpu_supports_bf16():
+        print("Procesor nie obsługuje bfloat16 - silnik 'bf16' używa modelu fp32 (eager).")
+        return model
+
+    height, width = _input_size(feature_extractor)
+    warmup_pixel_values = torch.rand(2, 3, height, width) * 2 - 1
+    for compile in ((True, False) if BF16_COMPILE else (False,)):
+        candidate = Bf16Model(model, compile)
+        try:
+            candidate.warm_up(warmup_pixel_values)
+            return candidate
+        except Exception as e:
+            print(f"Rozgrzewka silnika 'bf16' (kompilacja: {compile}) nie powiodła się: {e}")
+
+    print("Silnik 'bf16' używa modelu fp32 (eager).")
+    return model
+
+def agreement_images(limit=BACKEND_AGREEMENT_SAMPLES):
+    """
+    Zwraca do `limit` ścieżek obrazów z `BACKEND_AGREEMENT_IMAGES` (posortowanych po nazwie).
+    """
+    if not BACKEND_AGREEMENT_IMAGES or not os.path.isdir(BACKEND_AGREEMENT_IMAGES):
+        return []
+    return list(islice(iter_image_files(BACKEND_AGREEMENT_IMAGES, recursive=False), limit))
+
+def _sample_pixel_values(image_paths, feature_extractor):
+    images = []
+    for image_path in image_paths[:BACKEND_AGREEMENT_SAMPLES]:
+        try:
+            with Image.open(image_path) as image:
+                images.append(image.convert("RGB"))
+        except (OSError, UnidentifiedImageError) as e:
+            print(f"Pominięto obraz próbny {image_path}: {e}")
+    if not images:
+        return None
+    return feature_extractor(images=images, return_tensors="pt")["pixel_values"]
+
+def check_agreement(candidate, reference, pixel_values):
+    """
+    Zwraca odsetek próbek, dla których top-1 modelu `candidate` zgadza się z `reference`.
+    """
+    with torch.inference_mode():
+        expected = reference(pixel_values=pixel_values).logits.argmax(-1)
+        actual = candidate(pixel_values=pixel_values).logits.argmax(-1)
+    return float((expected == actual).float().mean())
+
+def measure_agreement(candidate, model, feature_extractor, sample_images=None):
+    """
+    Zgodność top-1 modelu `candidate` z modelem eager na prawdziwych obrazach: `sample_images`
+    lub, gdy nie podano, obrazach z `BACKEND_AGREEMENT_IMAGES`. Zwraca None, gdy brak obrazów.
+    """
+    if candidate is model:
+        return 1.0
+    pixel_values = _sample_pixel_values(sample_images or agreement_images(), feature_extractor)
+    if pixel_values is None:
+        return None
+    return check_agreement(candidate, model, pixel_values)
+
+def load_backend(backend=INFERENCE_BACKEND, model_name=MODEL_NAME, sample_images=None, model=None,
+                 feature_extractor=None):
+    """
+    Tworzy model dla wybranego silnika inferencji (eksport ONNX zapisywany jest w `CACHE_DIR`).
+
+    Dla silników innych niż "eager" sprawdzana jest zgodność top-1 z modelem eager
+    na obrazach `sample_images` (patrz `measure_agreement`).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Nieznany silnik inferencji: {backend}. Dostępne: {', '.join(BACKENDS)}.")
+
+    if model is None:
+        model, feature_extractor = get_model(model_name)
+    if backend == "eager":
+        return model
+
+    if backend == "quantized":
+        candidate = _build_quantized(model)
+    elif backend == "bf16":
+        candidate = _build_bf16(model, feature_extractor)
+        if candidate is model:
+            return model
+    else:
+        candidate = _build_onnx(model, model_name, feature_extractor)
+
+    agreement = measure_agreement(candidate, model, feature_extractor, sample_images)
+    if agreement is None:
+        print(f"Silnik '{backend}': nie sprawdzono zgodności z modelem eager (brak obrazów próbnych, "
+              f"patrz IMAGE_CLASSIFIER_AGREEMENT_IMAGES).")
+        return candidate
+
+    print(f"Silnik '{backend}': zgodność top-1 z modelem eager = {agreement:.1%}")
+    if agreement < BACKEND_MIN_AGREEMENT:
+        print(f"Uwaga: zgodność silnika '{backend}' jest niższa niż {BACKEND_MIN_AGREEMENT:.0%}.")
+
+    return candidate
+
+def get_backend(backend=INFERENCE_BACKEND, model_name=MODEL_NAME, sample_images=None):
+    """
+    Zwraca model dla wybranego silnika, tworząc go tylko przy pierwszym użyciu w procesie.
+
+    Model silnika przechowywany jest w `model_registry` razem z modelem bazowym,
+    więc jest zwalniany wraz z nim (LRU i bezczynność).
+    """
+    if backend == "eager":
+        return get_model(model_name)[0]
+
+    def build(model, feature_extractor):
+        return load_backend(backend, model_name, sample_images, model, feature_extractor)
+
+    # Blokada zapobiega równoległemu eksportowi tego samego silnika
+    with _lock:
+        return model_registry.derived(backend, build, model_name)
@@ -0,0 +1,232 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+
+BENCHMARK_FORMATS = ("JPEG", "PNG", "WEBP", "BMP", "TIFF")
+BENCHMARK_STAGES = ("discover", "decode", "preprocess", "infer", "write")
+
+# Mały, losowo zainicjowany ViT - nie wymaga pobierania wag z sieci
+TINY_VIT_CONFIG = {
+    "hidden_size": 192,
+    "num_hidden_layers": 4,
+    "num_attention_heads": 3,
+    "intermediate_size": 768,
+    "image_size": 224,
+    "patch_size": 16,
+    "num_labels": 1000,
+}
+
+
+def make_corpus(directory, count=200, min_size=96, max_size=1600, corrupt_fraction=0.05, seed=0):
+    """
+    Tworzy syntetyczny zbiór obrazów o różnych rozmiarach i formatach.
+
+    Część plików jest uszkodzona: obcięte pliki JPEG (rozpoznawane jako obrazy, błąd przy
+    dekodowaniu) oraz losowe bajty z rozszerzeniem .jpg (odrzucane już przy wyszukiwaniu).
+
+    Returns:
+        dict: Opis zbioru (liczba plików według formatu, liczba uszkodzonych).
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    summary = {"images": 0, "corrupt": 0, "formats": {}}
+
+    for index in range(count):
+        if rng.random() < corrupt_fraction:
+            path = os.path.join(directory, f"corrupt_{index:05d}.jpg")
+            if index % 2:
+                data = bytes(rng.integers(0, 256, 4096, dtype=np.uint8))
+            else:
+                image = Image.fromarray((rng.random((64, 64, 3)) * 255).astype(np.uint8))
+                image.save(path, "JPEG")
+                with open(path, "rb") as f:
+                    data = f.read()[:300]
+            with open(path, "wb") as f:
+                f.write(data)
+            summary["corrupt"] += 1
+            continue
+
+        image_format = BENCHMARK_FORMATS[index % len(BENCHMARK_FORMATS)]
+        width, height = (int(value) for value in rng.integers(min_size, max_size + 1, 2))
+        # Gładki obraz (powiększony szum) kompresuje się podobnie jak zdjęcie, w przeciwieństwie do czystego szumu
+        noise = (rng.random((max(2, height // 32), max(2, width // 32), 3)) * 255).astype(np.uint8)
+        image = Image.fromarray(noise).resize((width, height), Image.BILINEAR)
+        extension = "jpg" if image_format == "JPEG" else image_format.lower()
+        image.save(os.path.join(directory, f"image_{index:05d}.{extension}"), image_format)
+        summary["images"] += 1
+        summary["formats"][image_format] = summary["formats"].get(image_format, 0) + 1
+    return summary
+
+def tiny_model_name(config=None):
+    config = config or TINY_VIT_CONFIG
+    return f"benchmark/vit-random-{config['hidden_size']}x{config['num_hidden_layers']}"
+
+def register_tiny_model(config=None, seed=0):
+    """
+    Tworzy losowo zainicjowany ViT i rejestruje go w `model_registry` pod nazwą z `tiny_model_name`.
+    """
+    import torch
+    from transformers import ViTConfig, ViTForImageClassification, ViTImageProcessor
+    from utils.image_classifier.model_loader import model_registry
+
+    config = config or TINY_VIT_CONFIG
+    torch.manual_seed(seed)
+    model = ViTForImageClassification(ViTConfig(**config)).eval()
+    size = config["image_size"]
+    feature_extractor = ViTImageProcessor(size={"height": size, "width": size})
+    model_registry.register(model, feature_extractor, tiny_model_name(config))
+    return tiny_model_name(config)
+
+def peak_rss_mb():
+    """
+    Szczytowe zużycie pamięci (RSS) bieżącego procesu w MB albo None, gdy nie da się go odczytać.
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje wartość w KB, macOS w bajtach
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+def _run_process(corpus_dir, options):
+    # Każdy przebieg w osobnym procesie: szczytowy RSS i pamięć podręczna modeli nie przenoszą się między nimi
+    import torch
+    from utils.image_classifier.classifier import process_images
+    from utils.image_classifier.pipeline import StageStats
+
+    model_name = register_tiny_model()
+    stats = StageStats(keep_samples=True)
+    output_dir = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        result = process_images(corpus_dir, os.path.join(output_dir, "results.txt"), use_cache=False,
+                                model_name=model_name, stats=stats, **options)
+        seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    stages = {}
+    for stage, values in stats.as_dict().items():
+        stages[stage] = {
+            "count": values["count"],
+            "total_s": values["total_s"],
+            **{f"p{percent}_ms": value * 1000 for percent, value in stats.percentiles(stage).items()},
+        }
+    return {
+        "options": options,
+        "images": result["written"],
+        "seconds": seconds,
+        "images_per_second": result["written"] / seconds if seconds else 0.0,
+        "stages": stages,
+        "peak_rss_mb": peak_rss_mb(),
+        "torch_threads": torch.get_num_threads(),
+    }
+
+def default_scenarios(backends=("eager",)):
+    scenarios = {}
+    for backend in backends:
+        scenarios[f"{backend}"] = {"backend": backend}
+        scenarios[f"{backend}-fast"] = {"backend": backend, "fast_preprocess": True}
+        scenarios[f"{backend}-serial"] = {"backend": backend, "prefetch": False}
+    return scenarios
+
+def run_benchmark(corpus_dir=None, count=200, scenarios=None, batch_size=32, seed=0):
+    """
+    Uruchamia `process_images` na syntetycznym zbiorze dla każdego scenariusza.
+
+    Returns:
+        dict: Raport z informacjami o środowisku, zbiorze i wynikach scenariuszy
+        (obrazy/s, percentyle czasów etapów, szczytowy RSS).
+        Percentyle dotyczą pojedynczych pomiarów: obrazu (discover, decode, preprocess, write)
+        lub partii (infer).
+    """
+    import torch
+
+    scenarios = scenarios or default_scenarios()
+    temporary = corpus_dir is None
+    corpus_dir = corpus_dir or tempfile.mkdtemp(prefix="image_classifier_benchmark_")
+    try:
+        corpus = make_corpus(corpus_dir, count, seed=seed)
+        context = multiprocessing.get_context("spawn")
+        runs = {}
+        for name, options in scenarios.items():
+            options = {"batch_size": batch_size, **options}
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                runs[name] = executor.submit(_run_process, corpus_dir, options).result()
+            print(f"{name}: {runs[name]['images_per_second']:.1f} obrazów/s")
+    finally:
+        if temporary:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    return {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "cpu_count": os.cpu_count(),
+        "model": TINY_VIT_CONFIG,
+        "corpus": corpus,
+        "runs": runs,
+    }
+
+def compare_reports(baseline, current):
+    """
+    Zwraca linie z porównaniem przepustowości scenariuszy obecnych w obu raportach.
+    """
+    lines = []
+    for name, run in current["runs"].items():
+        previous = baseline["runs"].get(name)
+        if previous is None or not previous["images_per_second"]:
+            continue
+        ratio = run["images_per_second"] / previous["images_per_second"]
+        lines.append(f"{name}: {previous['images_per_second']:.1f} -> {run['images_per_second']:.1f} obrazów/s "
+                     f"({ratio - 1:+.1%})")
+    return lines
+
+def format_report(report):
+    lines = []
+    for name, run in report["runs"].items():
+        rss = f"{run['peak_rss_mb']:.0f} MB" if run["peak_rss_mb"] is not None else "?"
+        lines.append(f"{name}: {run['images']} obrazów, {run['images_per_second']:.1f} obrazów/s, szczytowy RSS {rss}")
+        for stage in BENCHMARK_STAGES:
+            values = run["stages"].get(stage)
+            if values:
+                lines.append(f"  {stage:>10}: p50 {values.get('p50_ms', 0):.2f} ms, p90 {values.get('p90_ms', 0):.2f} ms, "
+                             f"p99 {values.get('p99_ms', 0):.2f} ms")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test wydajności klasyfikatora obrazów na syntetycznych danych.")
+    parser.add_argument("output", help="Plik JSON z raportem")
+    parser.add_argument("--count", type=int, default=200, help="Liczba plików w zbiorze")
+    parser.add_argument("--corpus", help="Folder na zbiór (domyślnie tymczasowy)")
+    parser.add_argument("--backends", nargs="+", default=["eager"])
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--compare", help="Wcześniejszy raport JSON do porównania")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.corpus, args.count, default_scenarios(args.backends), args.batch_size)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(format_report(report))
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print("\n".join(compare_reports(json.load(f), report)))
@@ -0,0 +1,115 @@
+import threading
+import time
+from types import SimpleNamespace
+import torch
+from utils.image_classifier.backends import get_backend
+from utils.image_classifier.model_loader import get_model
+from utils.image_classifier.config import MODEL_NAME, INFERENCE_BACKEND, CASCADE_SMALL_MODEL, CASCADE_THRESHOLD
+
+
+class CascadeStats:
+    """
+    Statystyki kaskady: odsetek eskalacji i szacowany zaoszczędzony czas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.escalated = 0
+        self.small_time = 0.0
+        self.large_time = 0.0
+
+    def add(self, total, escalated, small_time, large_time):
+        with self._lock:
+            self.total += total
+            self.escalated += escalated
+            self.small_time += small_time
+            self.large_time += large_time
+
+    def escalation_rate(self):
+        return self.escalated / self.total if self.total else 0.0
+
+    def time_saved(self):
+        """
+        Szacunek: czas, jaki zająłby duży model dla wszystkich obrazów, minus czas kaskady.
+        """
+        if not self.escalated:
+            return 0.0
+        large_only = self.large_time / self.escalated * self.total
+        return large_only - (self.small_time + self.large_time)
+
+    def summary(self):
+        return (
+            f"Kaskada: {self.escalated}/{self.total} obrazów eskalowanych ({self.escalation_rate():.1%}), "
+            f"mały model {self.small_time:.2f}s, duży model {self.large_time:.2f}s, "
+            f"szacowana oszczędność {self.time_saved():.2f}s"
+        )
+
+
+class CascadeModel:
+    """
+    Kaskada dwóch modeli z interfejsem zgodnym z modelem ViT (`model(pixel_values=...).logits`).
+
+    Mały model klasyfikuje całą partię; obrazy, dla których pewność top-1 (softmax) jest
+    niższa niż `threshold`, są ponownie klasyfikowane dużym modelem. Oba modele muszą
+    mieć tę samą przestrzeń etykiet i to samo przetwarzanie wstępne, ponieważ ten sam
+    tensor `pixel_values` trafia do obu.
+    """
+
+    def __init__(self, small, large, threshold=CASCADE_THRESHOLD, stats=None):
+        if small.config.id2label != large.config.id2label:
+            raise ValueError("Modele kaskady muszą mieć te same etykiety.")
+        self.small = small
+        self.large = large
+        self.threshold = threshold
+        self.config = large.config
+        self.stats = stats if stats is not None else CascadeStats()
+
+    def __call__(self, pixel_values):
+        start = time.perf_counter()
+        with torch.inference_mode():
+            logits = self.small(pixel_values=pixel_values).logits
+            confidence = logits.softmax(-1).max(-1).values
+        small_time = time.perf_counter() - start
+
+        escalate = (confidence < self.threshold).nonzero().flatten()
+        large_time = 0.0
+        if len(escalate):
+            start = time.perf_counter()
+            with torch.inference_mode():
+                large_logits = self.large(pixel_values=pixel_values[escalate]).logits
+            large_time = time.perf_counter() - start
+            logits = logits.clone()
+            logits[escalate] = large_logits.to(logits.dtype)
+
+        self.stats.add(len(pixel_values), len(escalate), small_time, large_time)
+        return SimpleNamespace(logits=logits)
+
+
+def cascade_model_key(model_name, small_model_name, threshold):
+    """
+    Nazwa modelu używana w pamięci podręcznej wyników dla kaskady.
+    """
+    return f"{model_name}|cascade:{small_model_name}@{threshold}"
+
+def _processor_signature(feature_extractor):
+    return (
+        getattr(feature_extractor, "size", None),
+        list(getattr(feature_extractor, "image_mean", []) or []),
+        list(getattr(feature_extractor, "image_std", []) or []),
+        getattr(feature_extractor, "resample", None),
+    )
+
+def load_cascade(backend=INFERENCE_BACKEND, small_model_name=CASCADE_SMALL_MODEL, threshold=CASCADE_THRESHOLD,
+                 model_name=MODEL_NAME, sample_images=None):
+    """
+    Tworzy kaskadę z modeli załadowanych przez wybrany silnik inferencji
+    (`sample_images` - obrazy do sprawdzenia zgodności silnika, patrz `load_backend`).
+    """
+    _, small_processor = get_model(small_model_name)
+    _, large_processor = get_model(model_name)
+    if _processor_signature(small_processor) != _processor_signature(large_processor):
+        raise ValueError(f"Model {small_model_name} wymaga innego przetwarzania wstępnego niż {model_name}.")
+
+    return CascadeModel(get_backend(backend, small_model_name, sample_images),
+                        get_backend(backend, model_name, sample_images), threshold)
@@ -1,6 +1,40 @@
 import os
+import time
+from itertools import chain, islice
+import torch
 from PIL import Image, UnidentifiedImageError
-from utils.image_classifier.model_loader import load_model
+from utils.image_classifier.model_loader import model_registry
+from utils.image_classifier.backends import get_backend
+from utils.image_classifier.parallel import iter_classified_parallel
+from utils.image_classifier.sharding import select_shard
+from utils.image_classifier.result_cache import ResultCache, backend_key
+from utils.image_classifier.result_writer import ResultWriter
+from utils.image_classifier.discovery import iter_image_files, is_image_file
+from utils.image_classifier.dedupe import DuplicateFilter
+from utils.image_classifier.cascade import load_cascade, cascade_model_key
+from utils.image_classifier.embeddings import EmbeddingWriter, forward_with_embeddings, EMBEDDING_BACKENDS
+from utils.image_classifier.autotune import tuned_settings, apply_thread_settings
+from utils.image_classifier.pipeline import PrefetchPipeline, StageStats
+from utils.image_classifier.preprocessing import FastPreprocessor
+from utils.image_classifier.config import (
+    CLASSIFICATION_BATCH_SIZE,
+    PREFETCH_ENABLED,
+    FAST_PREPROCESS_ENABLED,
+    INFERENCE_BACKEND,
+    INFERENCE_BACKEND_OVERRIDE,
+    BACKEND_AGREEMENT_SAMPLES,
+    CLASSIFICATION_WORKERS,
+    MODEL_NAME,
+    RESULT_CACHE_ENABLED,
+    DISCOVERY_SNIFF,
+    DEDUPE_ENABLED,
+    DEDUPE_MAX_DISTANCE,
+    CASCADE_ENABLED,
+    CASCADE_SMALL_MODEL,
+    CASCADE_THRESHOLD,
+    AUTOTUNE_APPLY,
+    AUTOTUNE_APPLY_THREADS,
+)
 
 def classify_image(image_path, model, feature_extractor):
     """
@@ -17,7 +51,8 @@ def classify_image(image_path, model, feature_extractor):
     try:
         image = Image.open(image_path).convert("RGB")
         inputs = feature_extractor(images=image, return_tensors="pt")
-        outputs = model(**inputs)
+        with torch.inference_mode():
+            outputs = model(**inputs)
         predicted_class = outputs.logits.argmax(-1).item()
         return model.config.id2label[predicted_class]
     except UnidentifiedImageError:
@@ -25,36 +60,375 @@ def classify_image(image_path, model, feature_extractor):
     except Exception as e:
         return f"Błąd: {str(e)}"
 
-def process_images(input_path, output_path):
+def decode_image(image_path):
+    """
+    Wczytuje obraz z dysku jako RGB.
+    """
+    return Image.open(image_path).convert("RGB")
+
+def preprocess_decoded(image, feature_extractor):
+    """
+    Zwraca tensor pikseli (C, H, W) zdekodowanego obrazu, gotowy do złożenia w partię.
+    """
+    return feature_extractor(images=image, return_tensors="pt")["pixel_values"][0]
+
+def preprocess_image(image_path, feature_extractor):
+    """
+    Wczytuje obraz i zwraca tensor pikseli (C, H, W) gotowy do złożenia w partię.
+    """
+    return preprocess_decoded(decode_image(image_path), feature_extractor)
+
+def format_error(error):
+    if isinstance(error, UnidentifiedImageError):
+        return "Błąd: nie można zidentyfikować pliku jako obrazu"
+    return f"Błąd: {str(error)}"
+
+def predict_labels(pixel_values, model):
+    """
+    Wykonuje jeden przebieg modelu dla partii tensorów i zwraca listę etykiet.
+
+    Args:
+        pixel_values (torch.Tensor): Tensor o kształcie (N, C, H, W).
+        model: Załadowany model ViT.
+    """
+    with torch.inference_mode():
+        logits = model(pixel_values=pixel_values).logits
+    return labels_from_logits(logits, model)
+
+def labels_from_logits(logits, model):
+    return [model.config.id2label[index] for index in logits.argmax(-1).tolist()]
+
+def classify_prepared(prepared, model, collate=torch.stack, embedding_sink=None):
+    """
+    Klasyfikuje partię już przygotowanych wpisów (ścieżka, dane obrazu, błąd).
+
+    Args:
+        prepared (list): Krotki (ścieżka, dane obrazu, błąd).
+        model: Załadowany model ViT.
+        collate: Funkcja składająca listę danych obrazów w tensor `pixel_values`.
+        embedding_sink: Opcjonalna funkcja (ścieżki, osadzenia) wywoływana dla każdej partii.
+
+    Returns:
+        list: Krotki (ścieżka, etykieta lub komunikat błędu) w kolejności wejściowej.
+    """
+    results = [(path, format_error(error) if error is not None else None) for path, _, error in prepared]
+    positions = [index for index, (_, _, error) in enumerate(prepared) if error is None]
+
+    if positions:
+        try:
+            pixel_values = collate([prepared[index][1] for index in positions])
+            if embedding_sink is None:
+                labels = predict_labels(pixel_values, model)
+            else:
+                logits, embeddings = forward_with_embeddings(model, pixel_values)
+                labels = labels_from_logits(logits, model)
+                embedding_sink([prepared[index][0] for index in positions], embeddings)
+            for index, label in zip(positions, labels):
+                results[index] = (results[index][0], label)
+        except Exception as e:
+            for index in positions:
+                results[index] = (results[index][0], format_error(e))
+
+    return results
+
+def make_stages(feature_extractor, fast_preprocess=FAST_PREPROCESS_ENABLED):
+    """
+    Zwraca funkcje (dekodowanie, przetwarzanie, składanie partii) dla wybranego trybu.
+    """
+    if fast_preprocess:
+        fast = FastPreprocessor(feature_extractor)
+        return fast.decode, None, fast.collate
+    return decode_image, lambda image: preprocess_decoded(image, feature_extractor), torch.stack
+
+def _prepare_serial(path, decode, preprocess, stats):
+    try:
+        start = time.perf_counter()
+        value = decode(path)
+        decoded_at = time.perf_counter()
+        stats.add("decode", decoded_at - start)
+        if preprocess is not None:
+            value = preprocess(value)
+            stats.add("preprocess", time.perf_counter() - decoded_at)
+        return path, value, None
+    except Exception as e:
+        return path, None, e
+
+def iter_classified(files, model, feature_extractor, batch_size=CLASSIFICATION_BATCH_SIZE,
+                    prefetch=PREFETCH_ENABLED, stats=None, fast_preprocess=FAST_PREPROCESS_ENABLED,
+                    embedding_sink=None):
+    """
+    Generator zwracający pary (ścieżka, etykieta) dla kolejnych plików.
+
+    Przy `prefetch=True` dekodowanie i przetwarzanie obrazów odbywa się w puli wątków
+    równolegle z przebiegami modelu (patrz `PrefetchPipeline`).
+
+    Args:
+        files (iterable): Ścieżki do obrazów.
+        model: Załadowany model ViT.
+        feature_extractor: Feature extractor dla modelu ViT.
+        batch_size (int): Liczba obrazów w jednym przebiegu modelu.
+        prefetch (bool): Czy używać potoku wstępnego dekodowania.
+        stats (StageStats): Opcjonalny obiekt zbierający czasy etapów.
+        fast_preprocess (bool): Czy używać `FastPreprocessor` zamiast procesora Hugging Face.
+        embedding_sink: Opcjonalna funkcja (ścieżki, osadzenia) do zapisu osadzeń obrazów.
+    """
+    stats = stats if stats is not None else StageStats()
+    batch_size = max(1, batch_size)
+    decode, preprocess, collate = make_stages(feature_extractor, fast_preprocess)
+
+    if prefetch:
+        pipeline = PrefetchPipeline(decode, preprocess, stats=stats)
+        prepared_items = pipeline.run(files)
+    else:
+        pipeline = None
+        prepared_items = (_prepare_serial(path, decode, preprocess, stats) for path in files)
+
+    try:
+        for prepared in iter_batches(prepared_items, batch_size):
+            start = time.perf_counter()
+            classified = classify_prepared(prepared, model, collate, embedding_sink)
+            stats.add("infer", time.perf_counter() - start, len(prepared))
+            yield from classified
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+
+def iter_batches(items, batch_size):
+    """
+    Dzieli dowolny iterowalny zbiór na listy o długości co najwyżej `batch_size`.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def result_name(file_path, root=None):
+    """
+    Nazwa obrazu w pliku wynikowym: ścieżka względna wobec folderu wejściowego lub nazwa pliku.
+    """
+    if root is None:
+        return os.path.basename(file_path)
+    return os.path.relpath(file_path, root).replace(os.sep, "/")
+
+def timed_iter(items, stats, stage):
+    """
+    Przekazuje elementy dalej, doliczając do etapu `stage` czas oczekiwania na każdy z nich.
+    """
+    iterator = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        stats.add(stage, time.perf_counter() - start)
+        yield item
+
+def process_images(input_path, output_path, batch_size=None, prefetch=PREFETCH_ENABLED,
+                   fast_preprocess=FAST_PREPROCESS_ENABLED, backend=None,
+                   workers=CLASSIFICATION_WORKERS, shard_index=None, shard_count=None,
+                   use_cache=RESULT_CACHE_ENABLED, output_format=None, resume=False,
+                   recursive=False, include=None, exclude=None, sniff=DISCOVERY_SNIFF,
+                   dedupe=DEDUPE_ENABLED, dedupe_distance=DEDUPE_MAX_DISTANCE,
+                   cascade=CASCADE_ENABLED, cascade_threshold=CASCADE_THRESHOLD, embeddings_dir=None,
+                   on_result=None, model_name=MODEL_NAME, stats=None):
     """
     Przetwarza obrazy z listy plików lub folderu i zapisuje wyniki klasyfikacji do pliku tekstowego.
 
+    Wyniki są dopisywane do pliku na bieżąco (patrz `ResultWriter`), więc zużycie pamięci
+    nie rośnie z liczbą obrazów, a przerwany przebieg można wznowić z `resume=True`.
+
     Args:
         input_path (str or list): Ścieżka do folderu z obrazami lub lista plików.
         output_path (str): Ścieżka do pliku wynikowego.
+        batch_size (int): Liczba obrazów w jednym przebiegu modelu (1 = klasyfikacja pojedyncza).
+            Domyślnie wartość z autotunera dla tego hosta lub `CLASSIFICATION_BATCH_SIZE`.
+        prefetch (bool): Czy dekodować obrazy w tle, równolegle z inferencją.
+        fast_preprocess (bool): Czy dekodować obrazy w zmniejszonej rozdzielczości i normalizować je w NumPy.
+        backend (str): Silnik inferencji: "eager", "quantized", "onnx" lub "bf16".
+            Domyślnie wartość z autotunera dla tego hosta lub `INFERENCE_BACKEND`.
+        workers (int): Liczba procesów klasyfikujących; powyżej 1 każdy proces ładuje własny model.
+        shard_index (int): Numer fragmentu do przetworzenia na tym węźle (od 0).
+        shard_count (int): Liczba fragmentów, na które dzielona jest lista plików.
+        use_cache (bool): Czy pomijać obrazy, których etykieta jest już w `ResultCache`.
+        output_format (str): "txt" (`nazwa: etykieta`), "csv" lub "jsonl"; domyślnie wg rozszerzenia.
+        resume (bool): Czy dopisać wyniki do istniejącego pliku, pomijając już sklasyfikowane obrazy.
+        recursive (bool): Czy przeszukiwać podfoldery; wyniki zapisywane są wtedy pod ścieżką względną.
+        include (list): Wzorce glob plików do uwzględnienia.
+        exclude (list): Wzorce glob plików i folderów do pominięcia.
+        sniff (bool): Czy rozpoznawać obrazy po zawartości (sygnaturze) zamiast po rozszerzeniu.
+        dedupe (bool): Czy klasyfikować tylko jeden obraz z grupy niemal identycznych (dHash).
+            Pozostałe dziedziczą jego etykietę, a powiązania zapisywane są w `<plik>.duplicates.txt`
+            w formacie `nazwa: reprezentant`.
+        dedupe_distance (int): Maksymalna odległość Hamminga między skrótami duplikatów.
+        cascade (bool): Czy najpierw klasyfikować małym modelem (`CASCADE_SMALL_MODEL`), a do
+            MODEL_NAME przekazywać tylko obrazy z pewnością poniżej `cascade_threshold`.
+        cascade_threshold (float): Próg pewności top-1 małego modelu.
+        embeddings_dir (str): Katalog, do którego zapisywane są osadzenia obrazów (float16, memmap)
+            do wyszukiwania podobnych obrazów (patrz `EmbeddingIndex`). Wymaga silnika "eager" lub
+            "quantized"; duplikaty (`dedupe`) otrzymują kopię osadzenia swojego reprezentanta.
+        on_result (callable): Wywoływana z wątku klasyfikacji dla każdego zapisanego wpisu
+            jako `on_result(nazwa, etykieta, ścieżka)`, np. do podglądu wyników w GUI.
+        model_name (str): Nazwa modelu w `model_registry` (w trybie wieloprocesowym ładowanego w każdym procesie).
+        stats (StageStats): Obiekt zbierający czasy etapów (discover, decode, preprocess, infer, write).
+
+    Returns:
+        dict: Liczba zapisanych wpisów (`written`), pominiętych przy wznowieniu (`skipped`),
+        odczytanych z pamięci podręcznej (`cached`) i odziedziczonych od duplikatów (`inherited`).
     """
+    cache = None
+    writer = None
+    duplicates_writer = None
+    embedding_writer = None
+    acquired = []
     try:
-        model, feature_extractor = load_model()
-        results = {}
+        tuned = tuned_settings(model_name) if AUTOTUNE_APPLY else None
+        chosen_backend = backend or INFERENCE_BACKEND_OVERRIDE
+        if tuned and chosen_backend not in (None, tuned["backend"]):
+            # Jawnie wybrany silnik ma pierwszeństwo; partia i wątki strojone były dla innego
+            tuned = None
+        if tuned:
+            batch_size = batch_size or tuned["batch_size"]
+            backend = backend or tuned["backend"]
+            if AUTOTUNE_APPLY_THREADS and workers <= 1:
+                apply_thread_settings(tuned)
+        batch_size = batch_size or CLASSIFICATION_BATCH_SIZE
+        backend = backend or INFERENCE_BACKEND
+
+        if embeddings_dir and (workers > 1 or cascade):
+            raise ValueError("Zapis osadzeń jest dostępny tylko dla jednego procesu i bez kaskady.")
+        if embeddings_dir and backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Zapis osadzeń wymaga silnika {' lub '.join(EMBEDDING_BACKENDS)} (wybrano: {backend}).")
 
         if isinstance(input_path, list):
-            files = input_path
+            root = None
+            files = (file_path for file_path in input_path if is_image_file(file_path, sniff))
         elif isinstance(input_path, str) and os.path.isdir(input_path):
-            files = [os.path.join(input_path, file_name) for file_name in os.listdir(input_path)]
+            root = input_path
+            files = iter_image_files(input_path, recursive, include, exclude, sniff)
         else:
             raise ValueError("Nieprawidłowa ścieżka wejściowa. Oczekiwano folderu lub listy plików.")
 
-        for file_path in files:
-            if not file_path.lower().endswith((".png", ".jpg", ".jpeg", ".tiff", ".tif", ".bmp")):
-                continue
+        if shard_count is not None:
+            files = select_shard(files, shard_index or 0, shard_count, root)
+        stats = stats if stats is not None else StageStats()
+        files = timed_iter(files, stats, "discover")
+
+        sample_images = None
+        if backend != "eager":
+            # Zgodność silnika z modelem eager sprawdzana jest na pierwszych obrazach tego uruchomienia
+            sample_images = list(islice(files, BACKEND_AGREEMENT_SAMPLES))
+            files = chain(sample_images, files)
+
+        writer = ResultWriter(output_path, output_format, resume)
+        # Obrazy z pamięci podręcznej nie przechodzą przez model, więc nie miałyby osadzeń
+        cache = ResultCache() if use_cache and not embeddings_dir else None
+        model_key = cascade_model_key(model_name, CASCADE_SMALL_MODEL, cascade_threshold) if cascade else model_name
+        cache_backend = backend_key(backend, fast_preprocess)
+        counters = {"skipped": 0, "cached": 0}
+
+        duplicate_filter = None
+        if dedupe:
+            duplicate_filter = DuplicateFilter(dedupe_distance)
+            duplicates_writer = ResultWriter(f"{output_path}.duplicates.txt", "txt", resume)
+
+        def write_result(file_path, label):
+            file_name = result_name(file_path, root)
+            start = time.perf_counter()
+            writer.write(file_name, label)
+            stats.add("write", time.perf_counter() - start)
+            if on_result is not None:
+                on_result(file_name, label, file_path)
+
+        def write_inherited(file_path, representative, label):
+            write_result(file_path, label)
+            duplicates_writer.write(result_name(file_path, root), result_name(representative, root))
+            if embedding_writer is not None:
+                embedding_writer.copy(result_name(file_path, root), result_name(representative, root))
+
+        def pending_files():
+            # Wyniki już zapisane lub zapamiętane nie trafiają do dekodowania ani do modelu.
+            # Generator jest pobierany w tym wątku (PrefetchPipeline i iter_classified_parallel
+            # nie iterują wejścia w innych wątkach), więc zapisy i błędy trafiają do tej pętli.
+            for file_path in files:
+                file_name = result_name(file_path, root)
+                if file_name in writer.done:
+                    counters["skipped"] += 1
+                    continue
+                if cache is not None:
+                    label = cache.get(file_path, model_key, cache_backend)
+                    if label is not None:
+                        write_result(file_path, label)
+                        counters["cached"] += 1
+                        continue
+                if duplicate_filter is not None:
+                    start = time.perf_counter()
+                    representative, _, label = duplicate_filter.assign(file_path)
+                    stats.add("dedupe", time.perf_counter() - start)
+                    if representative is not None:
+                        if label is not None:
+                            write_inherited(file_path, representative, label)
+                        continue
+                yield file_path
+
+        model = None
+        if workers > 1:
+            classified = iter_classified_parallel(pending_files(), workers, batch_size, backend, fast_preprocess,
+                                                  cascade, cascade_threshold, model_name, sample_images)
+        else:
+            # Model oznaczony jako używany nie zostanie zwolniony z powodu bezczynności w trakcie długiego przebiegu
+            for name in ([CASCADE_SMALL_MODEL, model_name] if cascade else [model_name]):
+                _, feature_extractor = model_registry.acquire(name)
+                acquired.append(name)
+            if cascade:
+                model = load_cascade(backend, threshold=cascade_threshold, model_name=model_name,
+                                     sample_images=sample_images)
+            else:
+                model = get_backend(backend, model_name, sample_images)
+            embedding_sink = None
+            if embeddings_dir:
+                embedding_writer = EmbeddingWriter(embeddings_dir, append=resume, model_name=model_name,
+                                                   track_ids=dedupe, fast_preprocess=fast_preprocess)
+                embedding_sink = lambda paths, vectors: embedding_writer.add(
+                    [result_name(path, root) for path in paths], vectors
+                )
+            classified = iter_classified(pending_files(), model, feature_extractor, batch_size, prefetch, stats,
+                                         fast_preprocess, embedding_sink)
 
-            predicted_class = classify_image(file_path, model, feature_extractor)
-            results[os.path.basename(file_path)] = predicted_class
+        for file_path, predicted_class in classified:
+            write_result(file_path, predicted_class)
+            if cache is not None and not predicted_class.startswith("Błąd"):
+                cache.put(file_path, model_key, cache_backend, predicted_class)
+            if duplicate_filter is not None:
+                for duplicate_path, _ in duplicate_filter.resolve(file_path, predicted_class):
+                    write_inherited(duplicate_path, file_path, predicted_class)
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            for file_name, predicted_class in results.items():
-                f.write(f"{file_name}: {predicted_class}\n")
+        if cache is not None:
+            print(cache.summary())
+        if stats.as_dict():
+            print(f"Czasy etapów klasyfikacji:\n{stats.summary()}")
+        if cascade and model is not None:
+            print(model.stats.summary())
 
-        return results
+        writer.close()
+        if duplicates_writer is not None:
+            duplicates_writer.close()
+            counters["inherited"] = duplicate_filter.inherited
+        return {"written": writer.written, **counters}
     except Exception as e:
-        raise Exception(f"Błąd podczas przetwarzania obrazów: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Błąd podczas przetwarzania obrazów: {str(e)}")
+    finally:
+        if writer is not None:
+            writer.close(completed=False)
+        if duplicates_writer is not None:
+            duplicates_writer.close(completed=False)
+        if embedding_writer is not None:
+            embedding_writer.close()
+        if cache is not None:
+            cache.close()
+        for name in acquired:
+            model_registry.release(name)
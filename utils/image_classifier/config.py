@@ -4,4 +4,95 @@ from dotenv import load_dotenv
 load_dotenv()
 
 HUGGING_FACE_API_TOKEN = os.getenv("HUGGING_FACE_API_TOKEN")
-MODEL_NAME = "google/vit-base-patch16-224"
\ No newline at end of file
+MODEL_NAME = "google/vit-base-patch16-224"
+
+# Pamięć podręczna załadowanych modeli (współdzielona w obrębie procesu)
+MODEL_CACHE_MAX_MODELS = 2  # Maksymalna liczba modeli trzymanych jednocześnie w pamięci (LRU)
+MODEL_CACHE_IDLE_TIMEOUT = 15 * 60  # Czas bezczynności (s), po którym model jest zwalniany; None = bez limitu
+MODEL_WARMUP_ON_START = True  # Ładowanie modelu w tle przy tworzeniu zakładki
+
+# Wsadowa klasyfikacja obrazów
+CLASSIFICATION_BATCH_SIZE = 32  # Liczba obrazów przetwarzanych w jednym przebiegu modelu
+
+# Potok wstępnego dekodowania obrazów (prefetch)
+PREFETCH_ENABLED = True
+PREFETCH_WORKERS = min(8, os.cpu_count() or 1)  # Wątki dekodujące i przetwarzające obrazy
+PREFETCH_QUEUE_SIZE = 2 * CLASSIFICATION_BATCH_SIZE  # Maksymalna liczba przygotowanych obrazów w kolejce
+
+# Szybkie przetwarzanie wstępne (dekodowanie w zmniejszonej rozdzielczości + normalizacja NumPy)
+FAST_PREPROCESS_ENABLED = False
+FAST_PREPROCESS_TOLERANCE = 0.04  # Dopuszczalna największa różnica piksela względem ViTImageProcessor (po normalizacji, ok. 5/255)
+
+# Silnik inferencji: "eager" (PyTorch), "quantized" (PyTorch int8, dynamiczna kwantyzacja),
+# "onnx" (ONNX Runtime; wymaga pakietów onnx i onnxruntime) lub "bf16" (autocast bfloat16 na CPU)
+INFERENCE_BACKEND_OVERRIDE = os.getenv("IMAGE_CLASSIFIER_BACKEND")  # Silnik wybrany jawnie (nie zmienia go autotune)
+INFERENCE_BACKEND = INFERENCE_BACKEND_OVERRIDE or "eager"
+CACHE_DIR = os.getenv(
+    "IMAGE_CLASSIFIER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ukw-gui", "image_classifier")
+)
+BACKEND_AGREEMENT_SAMPLES = 16  # Liczba obrazów do sprawdzenia zgodności top-1 z modelem eager
+# Folder z przykładowymi obrazami do sprawdzania zgodności, gdy wywołujący nie poda własnych
+BACKEND_AGREEMENT_IMAGES = os.getenv("IMAGE_CLASSIFIER_AGREEMENT_IMAGES")
+BACKEND_MIN_AGREEMENT = 0.9  # Poniżej tej zgodności wyświetlane jest ostrzeżenie
+BF16_COMPILE = False  # Czy silnik "bf16" kompiluje model przez torch.compile (dłuższa rozgrzewka)
+BF16_WARMUP_STEPS = 2  # Liczba przebiegów rozgrzewających silnik "bf16" przed pierwszą partią
+
+# Lokalna kopia modelu (python -m utils.image_classifier.snapshot export): wagi safetensors
+# mapowane z dysku, ładowane bez połączenia z Hugging Face Hub i bez tokenu
+MODEL_SNAPSHOT_ENABLED = True  # Czy load_model korzysta z kopii lokalnej, jeśli istnieje
+MODEL_SNAPSHOT_DIR = os.getenv("IMAGE_CLASSIFIER_SNAPSHOT_DIR", os.path.join(CACHE_DIR, "snapshots"))
+
+# Klasyfikacja wieloprocesowa
+CLASSIFICATION_WORKERS = 1  # Liczba procesów roboczych (1 = bez dodatkowych procesów)
+CLASSIFICATION_BATCHES_PER_WORKER = 2  # Ile partii na proces może czekać na wynik (ogranicza pamięć)
+
+# Trwała pamięć podręczna wyników klasyfikacji (SQLite, klucz = skrót zawartości obrazu)
+RESULT_CACHE_ENABLED = True
+RESULT_CACHE_PATH = os.path.join(CACHE_DIR, "results.sqlite3")
+RESULT_CACHE_MAX_ENTRIES = 2_000_000  # Po przekroczeniu usuwane są najdawniej używane wpisy
+
+# Przyrostowy zapis wyników
+RESULT_FLUSH_EVERY = 200  # Co ile wpisów wyniki są zapisywane na dysk wraz z punktem kontrolnym
+
+# Wyszukiwanie obrazów
+DISCOVERY_SNIFF = True  # Rozpoznawanie obrazów po sygnaturze pliku zamiast po rozszerzeniu
+
+# Pomijanie niemal identycznych obrazów (dHash)
+DEDUPE_ENABLED = False
+DEDUPE_MAX_DISTANCE = 4  # Maksymalna odległość Hamminga (w bitach, z 64) dla duplikatów
+
+# Kaskada modeli: mały model klasyfikuje najpierw, niepewne obrazy trafiają do MODEL_NAME
+CASCADE_ENABLED = False
+CASCADE_SMALL_MODEL = "WinKawaks/vit-tiny-patch16-224"  # Ta sama przestrzeń etykiet (ImageNet-1k) co MODEL_NAME
+CASCADE_THRESHOLD = 0.6  # Minimalna pewność top-1 (softmax) małego modelu, poniżej której obraz jest eskalowany
+
+# Osadzenia (embeddings) obrazów i wyszukiwanie podobnych
+EMBEDDING_QUERY_CHUNK = 65536  # Liczba wektorów porównywanych w jednym mnożeniu macierzy
+EMBEDDING_IVF_LISTS = 1024  # Liczba list (centroidów) zgrubnego indeksu IVF
+EMBEDDING_IVF_PROBES = 16  # Liczba przeszukiwanych list przy zapytaniu
+
+# Tryb obserwowania folderu (ciągła klasyfikacja nowych obrazów)
+WATCH_BATCH_LATENCY = 1.0  # Maksymalny czas (s) zbierania nowych plików w partię
+WATCH_POLL_INTERVAL = 1.0  # Odstęp (s) między sprawdzeniami folderu, gdy inotify (watchdog) jest niedostępny
+WATCH_SETTLE_TIME = 0.5  # Plik musi być niezmieniony przez ten czas (s), zanim zostanie sklasyfikowany
+WATCH_FULL_RESCAN_INTERVAL = 60.0  # Co ile sekund tryb odpytywania sprawdza też pliki zmienione w miejscu
+
+# Automatyczne strojenie (python -m utils.image_classifier.autotune)
+AUTOTUNE_PATH = os.path.join(CACHE_DIR, "autotune.json")
+# Czy process_images używa zapisanego najlepszego rozmiaru partii i silnika dla tego hosta i modelu
+AUTOTUNE_APPLY = True
+# Czy stosować też strojone liczby wątków torch - zmienia je globalnie dla całego procesu (np. GUI)
+AUTOTUNE_APPLY_THREADS = False
+AUTOTUNE_BATCH_SIZES = (1, 8, 16, 32, 64)
+AUTOTUNE_SECONDS_PER_CANDIDATE = 2.0
+
+# Podgląd wyników w GUI (lista z miniaturami)
+RESULTS_THUMBNAIL_SIZE = 64  # Bok miniatury w pikselach
+RESULTS_THUMBNAIL_CACHE_SIZE = 512  # Maksymalna liczba miniatur trzymanych w pamięci (LRU)
+RESULTS_THUMBNAIL_WORKERS = 2  # Wątki dekodujące miniatury poza wątkiem interfejsu
+RESULTS_MAX_ROWS_PER_TICK = 2000  # Ile nowych wyników interfejs przyjmuje w jednym odświeżeniu
+
+# Klasyfikacja wideo (python -m utils.image_classifier.video; wymaga pakietu av)
+VIDEO_SAMPLING = "interval"  # "interval" (klatka co VIDEO_SAMPLE_INTERVAL s) lub "scene" (klatki kluczowe przy zmianie sceny)
+VIDEO_SAMPLE_INTERVAL = 2.0  # Odstęp (s) między próbkowanymi klatkami
+VIDEO_SCENE_THRESHOLD = 16  # Odległość Hamminga dHash (z 64 bitów) między klatkami kluczowymi oznaczająca nową scenę
@@ -0,0 +1,102 @@
+import threading
+import numpy as np
+from PIL import Image
+from utils.image_classifier.config import DEDUPE_MAX_DISTANCE
+
+HASH_SIZE = 8  # 8x8 porównań = 64-bitowy skrót
+
+
+def dhash_arrays(arrays):
+    """
+    Oblicza dHash dla partii obrazów w skali szarości o kształcie (N, HASH_SIZE, HASH_SIZE + 1).
+
+    Returns:
+        np.ndarray: Skróty uint64 o kształcie (N,).
+    """
+    arrays = np.asarray(arrays, dtype=np.int16)
+    bits = arrays[:, :, 1:] > arrays[:, :, :-1]
+    packed = np.packbits(bits.reshape(len(arrays), -1), axis=1)
+    return packed.view(">u8").ravel().astype(np.uint64)
+
+def load_hash_input(image_path):
+    """
+    Dekoduje obraz w minimalnej rozdzielczości potrzebnej do obliczenia dHash.
+    """
+    with Image.open(image_path) as image:
+        if image.format == "JPEG":
+            image.draft("L", ((HASH_SIZE + 1) * 4, HASH_SIZE * 4))
+        small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+    return np.asarray(small, dtype=np.uint8)
+
+def dhash(image_path):
+    return int(dhash_arrays([load_hash_input(image_path)])[0])
+
+
+class DuplicateFilter:
+    """
+    Grupuje niemal identyczne obrazy (serie zdjęć, ponownie zakodowane kopie) według dHash.
+
+    Pierwszy obraz grupy jest reprezentantem i trafia do modelu; kolejne obrazy w odległości
+    Hamminga do `max_distance` dziedziczą jego etykietę. Porównanie z wszystkimi
+    reprezentantami odbywa się jedną wektorową operacją XOR + zliczania bitów.
+    """
+
+    def __init__(self, max_distance=DEDUPE_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._hashes = np.empty(1024, dtype=np.uint64)
+        self._count = 0
+        self._representatives = []
+        self._labels = {}  # reprezentant -> etykieta
+        self._waiting = {}  # reprezentant -> [(plik, odległość)] czekające na etykietę
+        self.inherited = 0
+
+    def _nearest(self, value):
+        if not self._count:
+            return None, None
+        distances = np.bitwise_count(self._hashes[:self._count] ^ np.uint64(value))
+        index = int(distances.argmin())
+        return index, int(distances[index])
+
+    def _add_representative(self, value, image_path):
+        if self._count == len(self._hashes):
+            self._hashes = np.concatenate([self._hashes, np.empty_like(self._hashes)])
+        self._hashes[self._count] = value
+        self._count += 1
+        self._representatives.append(image_path)
+
+    def assign(self, image_path):
+        """
+        Przypisuje obraz do grupy.
+
+        Returns:
+            tuple: (reprezentant, odległość, etykieta). Reprezentant None oznacza, że obraz
+            sam został reprezentantem i wymaga klasyfikacji. Etykieta None przy znanym
+            reprezentancie oznacza, że obraz czeka na jego wynik (patrz `resolve`).
+        """
+        try:
+            value = dhash(image_path)
+        except Exception:
+            # Nieczytelny plik trafia do modelu, który zapisze dla niego błąd
+            return None, None, None
+
+        with self._lock:
+            index, distance = self._nearest(value)
+            if index is None or distance > self.max_distance:
+                self._add_representative(value, image_path)
+                return None, None, None
+
+            representative = self._representatives[index]
+            self.inherited += 1
+            label = self._labels.get(representative)
+            if label is None:
+                self._waiting.setdefault(representative, []).append((image_path, distance))
+            return representative, distance, label
+
+    def resolve(self, representative, label):
+        """
+        Zapamiętuje etykietę reprezentanta i zwraca oczekujące na nią obrazy [(plik, odległość)].
+        """
+        with self._lock:
+            self._labels[representative] = label
+            return self._waiting.pop(representative, [])
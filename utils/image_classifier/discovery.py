@@ -0,0 +1,94 @@
+import fnmatch
+import os
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tiff", ".tif", ".bmp", ".webp")
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov", ".webm")
+
+# Sygnatury (magic bytes) obsługiwanych formatów: warianty, z których każdy jest listą
+# par (przesunięcie, bajty) - wszystkie pary wariantu muszą się zgadzać
+SIGNATURES = {
+    "PNG": [[(0, b"\x89PNG\r\n\x1a\n")]],
+    "JPEG": [[(0, b"\xff\xd8\xff")]],
+    "TIFF": [[(0, b"II*\x00")], [(0, b"MM\x00*")]],
+    "BMP": [[(0, b"BM")]],
+    "WEBP": [[(0, b"RIFF"), (8, b"WEBP")]],
+}
+SNIFF_BYTES = 16
+
+
+def sniff_image_format(file_path):
+    """
+    Rozpoznaje format obrazu po pierwszych bajtach pliku. Zwraca nazwę formatu lub None.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            header = f.read(SNIFF_BYTES)
+    except OSError:
+        return None
+
+    for image_format, variants in SIGNATURES.items():
+        for parts in variants:
+            if all(header[offset:offset + len(magic)] == magic for offset, magic in parts):
+                return image_format
+    return None
+
+def _matches(relative_path, patterns):
+    name = os.path.basename(relative_path)
+    return any(fnmatch.fnmatch(relative_path, pattern) or fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+def is_image_file(file_path, sniff=True):
+    """
+    Sprawdza, czy plik jest obrazem - po zawartości (`sniff=True`) lub po rozszerzeniu.
+    """
+    if sniff:
+        return sniff_image_format(file_path) is not None
+    return file_path.lower().endswith(IMAGE_EXTENSIONS)
+
+def iter_image_files(root, recursive=False, include=None, exclude=None, sniff=True):
+    """
+    Leniwie zwraca ścieżki obrazów w folderze, bez budowania pełnej listy w pamięci.
+
+    Przechodzi drzewo katalogów przez `os.scandir`, więc klasyfikacja może rozpocząć się
+    od pierwszego znalezionego pliku, gdy reszta drzewa nie jest jeszcze przejrzana.
+
+    Args:
+        root (str): Folder początkowy.
+        recursive (bool): Czy wchodzić do podfolderów.
+        include (list): Wzorce glob (ścieżka względna lub nazwa), które plik musi spełniać.
+        exclude (list): Wzorce glob plików i folderów do pominięcia.
+        sniff (bool): Czy rozpoznawać obrazy po zawartości zamiast po rozszerzeniu.
+    """
+    return _iter_files(root, recursive, include, exclude, lambda path: is_image_file(path, sniff))
+
+def iter_video_files(root, recursive=False, include=None, exclude=None):
+    """
+    Leniwie zwraca ścieżki plików wideo (po rozszerzeniu) w folderze; argumenty jak w `iter_image_files`.
+    """
+    return _iter_files(root, recursive, include, exclude, lambda path: path.lower().endswith(VIDEO_EXTENSIONS))
+
+def _iter_files(root, recursive, include, exclude, accept):
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    relative_path = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                    if exclude and _matches(relative_path, exclude):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            subdirectories.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                    if include and not _matches(relative_path, include):
+                        continue
+                    if accept(entry.path):
+                        yield entry.path
+        except OSError as e:
+            # Podfoldery znalezione przed błędem są nadal odwiedzane
+            print(f"Nie można odczytać folderu {directory}: {e}")
+        # Odwrócona kolejność, aby podfoldery były odwiedzane w kolejności zwróconej przez scandir
+        stack.extend(reversed(subdirectories))
@@ -0,0 +1,289 @@
+import argparse
+import json
+import os
+import numpy as np
+import torch
+from utils.image_classifier.config import (
+    MODEL_NAME,
+    EMBEDDING_QUERY_CHUNK,
+    EMBEDDING_IVF_LISTS,
+    EMBEDDING_IVF_PROBES,
+)
+
+VECTORS_FILE = "vectors.f16"
+IDS_FILE = "ids.txt"
+META_FILE = "meta.json"
+IVF_FILE = "ivf.npz"
+EMBEDDING_BACKENDS = ("eager", "quantized")  # Silniki z modelem PyTorch ViT (dostęp do model.vit)
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def forward_with_embeddings(model, pixel_values):
+    """
+    Jeden przebieg ViT zwracający logity oraz znormalizowane osadzenia tokenu CLS
+    (to samo wejście, z którego korzysta klasyfikator modelu).
+    """
+    if not hasattr(model, "vit") or not hasattr(model, "classifier"):
+        raise ValueError("Zapis osadzeń wymaga modelu PyTorch ViT (silnik 'eager' lub 'quantized').")
+    with torch.inference_mode():
+        pooled = model.vit(pixel_values=pixel_values).last_hidden_state[:, 0, :]
+        logits = model.classifier(pooled)
+    return logits, normalize(pooled.float().numpy())
+
+
+def _read_meta(directory):
+    path = os.path.join(directory, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_meta(directory, meta):
+    temp_path = os.path.join(directory, f"{META_FILE}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(temp_path, os.path.join(directory, META_FILE))
+
+
+class EmbeddingWriter:
+    """
+    Dopisuje osadzenia float16 do pliku binarnego (czytanego później jako np.memmap)
+    oraz identyfikatory obrazów do pliku `ids.txt`, wiersz po wierszu.
+
+    Przy `track_ids=True` zapamiętywany jest numer wiersza każdego identyfikatora,
+    co pozwala skopiować osadzenie obrazu dla jego duplikatu (patrz `copy`).
+    """
+
+    def __init__(self, directory, append=False, model_name=MODEL_NAME, track_ids=False, fast_preprocess=False):
+        self.directory = directory
+        self.model_name = model_name
+        self.fast_preprocess = fast_preprocess
+        self._rows = {} if track_ids else None
+        os.makedirs(directory, exist_ok=True)
+
+        meta = _read_meta(directory) if append else None
+        if meta and (meta.get("model", model_name), meta.get("fast_preprocess", False)) != (model_name, fast_preprocess):
+            raise ValueError(f"Osadzenia w {directory} pochodzą z innego modelu lub trybu przetwarzania wstępnego "
+                             f"({meta.get('model')}, szybkie: {meta.get('fast_preprocess', False)}).")
+        self.dim = meta["dim"] if meta else None
+        self.count = self._repair() if meta else 0
+
+        mode = "a" if meta else "w"
+        self._vectors = open(os.path.join(directory, VECTORS_FILE), mode + "b")
+        self._ids = open(os.path.join(directory, IDS_FILE), mode, encoding="utf-8")
+        if not meta and os.path.exists(os.path.join(directory, IVF_FILE)):
+            os.remove(os.path.join(directory, IVF_FILE))
+
+    def _repair(self):
+        # Po przerwanym zapisie wyrównujemy oba pliki do liczby kompletnych wpisów
+        vectors_path = os.path.join(self.directory, VECTORS_FILE)
+        ids_path = os.path.join(self.directory, IDS_FILE)
+        vector_count = os.path.getsize(vectors_path) // (self.dim * 2) if os.path.exists(vectors_path) else 0
+        with open(ids_path, "r", encoding="utf-8") as f:
+            ids = [line for line in f.read().split("\n") if line]
+        count = min(vector_count, len(ids))
+
+        with open(vectors_path, "r+b") as f:
+            f.truncate(count * self.dim * 2)
+        if len(ids) != count:
+            with open(ids_path, "w", encoding="utf-8") as f:
+                f.write("".join(f"{image_id}\n" for image_id in ids[:count]))
+        return count
+
+    def add(self, ids, vectors):
+        vectors = np.asarray(vectors, dtype=np.float16)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            _write_meta(self.directory, self._meta(0))
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Nieprawidłowy wymiar osadzeń: {vectors.shape[1]} (oczekiwano {self.dim}).")
+
+        self._vectors.write(np.ascontiguousarray(vectors).tobytes())
+        self._ids.write("".join(f"{image_id}\n" for image_id in ids))
+        if self._rows is not None:
+            self._rows.update((image_id, self.count + offset) for offset, image_id in enumerate(ids))
+        self.count += len(ids)
+
+    def copy(self, image_id, source_id):
+        """
+        Zapisuje dla `image_id` osadzenie zapisanego wcześniej obrazu `source_id`.
+        Zwraca False, gdy osadzenia `source_id` nie ma (np. błąd klasyfikacji).
+        """
+        row = self._rows.get(source_id) if self._rows is not None else None
+        if row is None:
+            return False
+        row_size = self.dim * 2
+        self._vectors.flush()
+        with open(os.path.join(self.directory, VECTORS_FILE), "rb") as f:
+            f.seek(row * row_size)
+            vector = np.frombuffer(f.read(row_size), dtype=np.float16)
+        self.add([image_id], vector[np.newaxis, :])
+        return True
+
+    def close(self):
+        if self._vectors.closed:
+            return
+        self._vectors.close()
+        self._ids.close()
+        if self.dim is not None:
+            _write_meta(self.directory, self._meta(self.count))
+
+    def _meta(self, count):
+        return {"dim": self.dim, "count": count, "model": self.model_name, "fast_preprocess": self.fast_preprocess}
+
+
+class EmbeddingIndex:
+    """
+    Wyszukiwanie obrazów podobnych (podobieństwo kosinusowe) w zapisanych osadzeniach.
+
+    Wektory są mapowane z dysku (np.memmap) i porównywane blokami przez mnożenie macierzy,
+    więc pamięć nie rośnie z rozmiarem zbioru. Opcjonalny indeks IVF (`build_ivf`) dzieli
+    wektory na listy wokół centroidów k-średnich; zapytanie przeszukuje wtedy tylko
+    `probes` najbliższych list zamiast całego zbioru.
+    """
+
+    def __init__(self, directory):
+        meta = _read_meta(directory)
+        if meta is None:
+            raise FileNotFoundError(f"Brak osadzeń w katalogu {directory}.")
+        self.directory = directory
+        self.dim = meta["dim"]
+        self.model_name = meta.get("model", MODEL_NAME)
+        self.fast_preprocess = meta.get("fast_preprocess", False)
+
+        vectors_path = os.path.join(directory, VECTORS_FILE)
+        count = os.path.getsize(vectors_path) // (self.dim * 2)
+        self.vectors = np.memmap(vectors_path, dtype=np.float16, mode="r", shape=(count, self.dim))
+        with open(os.path.join(directory, IDS_FILE), "r", encoding="utf-8") as f:
+            self.ids = f.read().split("\n")[:count]
+
+        self.centroids = None
+        ivf_path = os.path.join(directory, IVF_FILE)
+        if os.path.exists(ivf_path):
+            ivf = np.load(ivf_path)
+            if int(ivf["count"]) == count:
+                self.centroids, self.order, self.offsets = ivf["centroids"], ivf["order"], ivf["offsets"]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _iter_blocks(self, rows=None):
+        total = len(self) if rows is None else len(rows)
+        for start in range(0, total, EMBEDDING_QUERY_CHUNK):
+            if rows is None:
+                positions = np.arange(start, min(start + EMBEDDING_QUERY_CHUNK, total))
+                yield positions, np.asarray(self.vectors[start:start + EMBEDDING_QUERY_CHUNK], dtype=np.float32)
+            else:
+                positions = np.sort(rows[start:start + EMBEDDING_QUERY_CHUNK])
+                yield positions, np.asarray(self.vectors[positions], dtype=np.float32)
+
+    def _top_k(self, queries, k, rows=None):
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+
+        for positions, block in self._iter_blocks(rows):
+            scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+            candidates = np.concatenate([best_rows, np.broadcast_to(positions, (len(queries), len(positions)))], axis=1)
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                candidates = np.take_along_axis(candidates, keep, axis=1)
+            best_scores, best_rows = scores, candidates
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_rows, order, axis=1)
+
+    def search(self, queries, k=10, probes=EMBEDDING_IVF_PROBES):
+        """
+        Zwraca dla każdego wektora zapytania listę `k` par (identyfikator, podobieństwo).
+        """
+        queries = normalize(np.atleast_2d(queries))
+        if self.centroids is None:
+            scores, rows = self._top_k(queries, k)
+            return [self._format(score_row, index_row) for score_row, index_row in zip(scores, rows)]
+
+        results = []
+        nearest_lists = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :probes]
+        for query, lists in zip(queries, nearest_lists):
+            rows = np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+            scores, indices = self._top_k(query[None, :], k, rows)
+            results.append(self._format(scores[0], indices[0]))
+        return results
+
+    def _format(self, scores, rows):
+        return [(self.ids[row], float(score)) for score, row in zip(scores, rows) if np.isfinite(score)]
+
+    def build_ivf(self, n_lists=EMBEDDING_IVF_LISTS, iterations=10, sample_size=None, seed=0):
+        """
+        Buduje zgrubny indeks IVF (sferyczne k-średnie na próbce wektorów) i zapisuje go obok osadzeń.
+        """
+        count = len(self)
+        n_lists = max(1, min(n_lists, count))
+        rng = np.random.default_rng(seed)
+        sample_size = min(count, sample_size or n_lists * 64)
+        sample = normalize(self.vectors[np.sort(rng.choice(count, sample_size, replace=False))])
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(iterations):
+            assignment = (sample @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = normalize(sums)
+
+        assignment = np.empty(count, dtype=np.int64)
+        for positions, block in self._iter_blocks():
+            assignment[positions] = (block @ centroids.T).argmax(axis=1)
+
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        np.savez(os.path.join(self.directory, IVF_FILE), centroids=centroids, order=order, offsets=offsets, count=count)
+        self.centroids, self.order, self.offsets = centroids, order, offsets
+
+
+def embed_images(image_paths, model_name=MODEL_NAME, fast_preprocess=False):
+    """
+    Oblicza znormalizowane osadzenia dla podanych obrazów (tym samym przetwarzaniem wstępnym co klasyfikacja).
+    """
+    from utils.image_classifier.classifier import make_stages
+    from utils.image_classifier.model_loader import get_model
+
+    model, feature_extractor = get_model(model_name)
+    decode, preprocess, collate = make_stages(feature_extractor, fast_preprocess)
+    prepared = [decode(path) for path in image_paths]
+    if preprocess is not None:
+        prepared = [preprocess(image) for image in prepared]
+    return forward_with_embeddings(model, collate(prepared))[1]
+
+def similar_images(directory, image_path, k=10):
+    """
+    Zwraca `k` obrazów najbardziej podobnych do `image_path` jako pary (identyfikator, podobieństwo).
+    Zapytanie jest osadzane tym samym modelem i przetwarzaniem wstępnym, co zapisane osadzenia.
+    """
+    index = EmbeddingIndex(directory)
+    return index.search(embed_images([image_path], index.model_name, index.fast_preprocess), k)[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indeks osadzeń obrazów i wyszukiwanie podobnych.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Zbuduj indeks IVF")
+    build_parser.add_argument("directory")
+    build_parser.add_argument("--lists", type=int, default=EMBEDDING_IVF_LISTS)
+    query_parser = subparsers.add_parser("query", help="Znajdź obrazy podobne do podanego")
+    query_parser.add_argument("directory")
+    query_parser.add_argument("image")
+    query_parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        EmbeddingIndex(args.directory).build_ivf(args.lists)
+        print(f"Zbudowano indeks IVF ({args.lists} list) w {args.directory}")
+    else:
+        for image_id, score in similar_images(args.directory, args.image, args.k):
+            print(f"{score:.4f}  {image_id}")
@@ -1,17 +1,225 @@
+import threading
+import time
+from collections import OrderedDict
 from transformers import ViTImageProcessor, ViTForImageClassification
-from utils.image_classifier.config import HUGGING_FACE_API_TOKEN, MODEL_NAME
+from utils.image_classifier.snapshot import has_snapshot, load_snapshot
+from utils.image_classifier.config import (
+    HUGGING_FACE_API_TOKEN,
+    MODEL_NAME,
+    MODEL_CACHE_MAX_MODELS,
+    MODEL_CACHE_IDLE_TIMEOUT,
+    MODEL_SNAPSHOT_ENABLED,
+)
 
-def load_model():
+def load_model(model_name=MODEL_NAME, processor_name=None):
     """
-    Ładuje model ViT z Hugging Face.
+    Ładuje model ViT z lokalnej kopii (patrz `export_snapshot`), a gdy jej nie ma - z Hugging Face.
+
+    Args:
+        model_name (str): Nazwa modelu w Hugging Face Hub.
+        processor_name (str): Nazwa procesora obrazów (domyślnie taka sama jak modelu).
     """
     try:
+        if MODEL_SNAPSHOT_ENABLED and processor_name in (None, model_name) and has_snapshot(model_name):
+            return load_snapshot(model_name)
+
         if not HUGGING_FACE_API_TOKEN:
             raise ValueError("Token Hugging Face nie został ustawiony w pliku .env.")
 
-        model = ViTForImageClassification.from_pretrained(MODEL_NAME, token=HUGGING_FACE_API_TOKEN)
-        feature_extractor = ViTImageProcessor.from_pretrained(MODEL_NAME)
+        model = ViTForImageClassification.from_pretrained(model_name, token=HUGGING_FACE_API_TOKEN)
+        model.eval()
+        feature_extractor = ViTImageProcessor.from_pretrained(processor_name or model_name)
 
         return model, feature_extractor
     except Exception as e:
-        raise Exception(f"Błąd podczas ładowania modelu: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Błąd podczas ładowania modelu: {str(e)}")
+
+
+class ModelRegistry:
+    """
+    Przechowuje załadowane modele w pamięci procesu, kluczowane nazwą modelu i procesora.
+
+    Kolejne uruchomienia klasyfikacji korzystają z już załadowanych wag zamiast
+    wywoływać ponownie `from_pretrained`. Równoległe żądania tego samego modelu
+    czekają na jedno ładowanie. Przy wielu modelach najdawniej używany jest zwalniany
+    (LRU), a modele nieużywane dłużej niż `idle_timeout` sekund są usuwane przez
+    okresowe sprawdzanie w tle - także wtedy, gdy nikt nie korzysta z rejestru.
+    Żądany model nigdy nie jest zwalniany z powodu bezczynności w chwili, gdy ktoś go pobiera,
+    ani w trakcie użycia zgłoszonego przez `acquire` (do odpowiadającego mu `release`).
+    """
+
+    def __init__(self, max_models=MODEL_CACHE_MAX_MODELS, idle_timeout=MODEL_CACHE_IDLE_TIMEOUT, loader=load_model):
+        self.max_models = max_models
+        self.idle_timeout = idle_timeout
+        self.loader = loader
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # klucz -> [model, feature_extractor, czas ostatniego użycia, obiekty pochodne, liczba użytkowników]
+        self._loading = {}  # klucz -> threading.Event dla trwającego ładowania
+        self._sweeper = None  # threading.Timer okresowo zwalniający bezczynne modele
+
+    @staticmethod
+    def make_key(model_name=MODEL_NAME, processor_name=None):
+        return model_name, processor_name or model_name
+
+    def get(self, model_name=MODEL_NAME, processor_name=None):
+        """
+        Zwraca parę (model, feature_extractor), ładując ją tylko przy pierwszym użyciu.
+        """
+        key = self.make_key(model_name, processor_name)
+
+        while True:
+            with self._lock:
+                self._evict_idle(keep=key)
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry[2] = time.monotonic()
+                    self._entries.move_to_end(key)
+                    return entry[0], entry[1]
+
+                event = self._loading.get(key)
+                if event is None:
+                    event = threading.Event()
+                    event.error = None
+                    self._loading[key] = event
+                    break
+
+            # Inny wątek już ładuje ten model - czekamy na jego wynik
+            event.wait()
+            if event.error is not None:
+                raise event.error
+
+        try:
+            model, feature_extractor = self.loader(*key)
+        except Exception as e:
+            event.error = e
+            with self._lock:
+                del self._loading[key]
+            event.set()
+            raise
+
+        with self._lock:
+            self._entries[key] = [model, feature_extractor, time.monotonic(), {}, 0]
+            self._entries.move_to_end(key)
+            del self._loading[key]
+            self._evict_lru()
+            self._schedule_sweep()
+        event.set()
+
+        return model, feature_extractor
+
+    def register(self, model, feature_extractor, model_name=MODEL_NAME, processor_name=None):
+        """
+        Umieszcza w pamięci podręcznej model utworzony poza `loader` (np. losowo zainicjowany do testów wydajności).
+        """
+        key = self.make_key(model_name, processor_name)
+        with self._lock:
+            self._entries[key] = [model, feature_extractor, time.monotonic(), {}, 0]
+            self._entries.move_to_end(key)
+            self._evict_lru()
+            self._schedule_sweep()
+
+    def acquire(self, model_name=MODEL_NAME, processor_name=None):
+        """
+        Jak `get`, ale oznacza model jako używany: do wywołania `release` nie jest zwalniany
+        z powodu bezczynności, nawet gdy użycie (np. długa klasyfikacja) trwa dłużej niż `idle_timeout`.
+        """
+        key = self.make_key(model_name, processor_name)
+        while True:
+            model, feature_extractor = self.get(model_name, processor_name)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] is model:
+                    entry[4] += 1
+                    return model, feature_extractor
+
+    def release(self, model_name=MODEL_NAME, processor_name=None):
+        """
+        Kończy użycie rozpoczęte przez `acquire`; czas bezczynności liczony jest od tej chwili.
+        """
+        with self._lock:
+            entry = self._entries.get(self.make_key(model_name, processor_name))
+            if entry is not None and entry[4] > 0:
+                entry[4] -= 1
+                entry[2] = time.monotonic()
+
+    def derived(self, name, build, model_name=MODEL_NAME, processor_name=None):
+        """
+        Zwraca obiekt pochodny modelu (np. model dla innego silnika inferencji), tworząc go
+        przez `build(model, feature_extractor)` tylko raz. Obiekt jest przechowywany we wpisie
+        modelu, więc zwalniany jest razem z nim (LRU i bezczynność).
+        """
+        model, feature_extractor = self.get(model_name, processor_name)
+        key = self.make_key(model_name, processor_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is model and name in entry[3]:
+                return entry[3][name]
+
+        value = build(model, feature_extractor)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is model:
+                value = entry[3].setdefault(name, value)
+        return value
+
+    def warm_up(self, model_name=MODEL_NAME, processor_name=None):
+        """
+        Ładuje model w wątku tła, aby pierwsza klasyfikacja nie czekała na wagi.
+        """
+        def _run():
+            try:
+                self.get(model_name, processor_name)
+            except Exception as e:
+                print(f"Nie udało się wstępnie załadować modelu {model_name}: {e}")
+
+        thread = threading.Thread(target=_run, daemon=True)
+        thread.start()
+        return thread
+
+    def is_loaded(self, model_name=MODEL_NAME, processor_name=None):
+        with self._lock:
+            return self.make_key(model_name, processor_name) in self._entries
+
+    def evict(self, model_name=MODEL_NAME, processor_name=None):
+        with self._lock:
+            self._entries.pop(self.make_key(model_name, processor_name), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict_idle(self, keep=None):
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        for key in [k for k, entry in self._entries.items()
+                    if k != keep and not entry[4] and now - entry[2] > self.idle_timeout]:
+            del self._entries[key]
+
+    def _schedule_sweep(self):
+        # Wywoływane pod blokadą; jeden zegar na rejestr, dopóki jakiś model jest w pamięci
+        if self.idle_timeout is None or self._sweeper is not None or not self._entries:
+            return
+        self._sweeper = threading.Timer(max(1.0, self.idle_timeout / 4), self._sweep)
+        self._sweeper.daemon = True
+        self._sweeper.start()
+
+    def _sweep(self):
+        with self._lock:
+            self._sweeper = None
+            self._evict_idle()
+            self._schedule_sweep()
+
+    def _evict_lru(self):
+        while self.max_models and len(self._entries) > self.max_models:
+            self._entries.popitem(last=False)
+
+
+model_registry = ModelRegistry()
+
+def get_model(model_name=MODEL_NAME, processor_name=None):
+    """
+    Zwraca model ViT ze współdzielonej pamięci podręcznej procesu.
+    """
+    return model_registry.get(model_name, processor_name)
@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import torch
+from utils.image_classifier.config import (
+    CLASSIFICATION_BATCH_SIZE,
+    CLASSIFICATION_BATCHES_PER_WORKER,
+    INFERENCE_BACKEND,
+    FAST_PREPROCESS_ENABLED,
+    CASCADE_ENABLED,
+    CASCADE_THRESHOLD,
+    MODEL_NAME,
+)
+
+_worker_state = {}
+
+
+def threads_per_worker(workers, cpu_count=None):
+    """
+    Dobiera liczbę wątków torch na proces tak, aby procesy x wątki ≈ liczba rdzeni.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // max(1, workers))
+
+def _init_worker(*args):
+    # Wyjątek inicjalizatora zepsułby całą pulę (BrokenProcessPool) i ukrył przyczynę,
+    # więc zapamiętujemy go i zgłaszamy przy pierwszym zadaniu
+    try:
+        _load_worker_model(*args)
+    except Exception as e:
+        _worker_state["init_error"] = f"{type(e).__name__}: {e}"
+
+def _load_worker_model(threads, backend, fast_preprocess, cascade, cascade_threshold, model_name, sample_images):
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    from utils.image_classifier.backends import get_backend
+    from utils.image_classifier.cascade import load_cascade
+    from utils.image_classifier.model_loader import get_model
+
+    _worker_state["feature_extractor"] = get_model(model_name)[1]
+    if cascade:
+        _worker_state["model"] = load_cascade(backend, threshold=cascade_threshold, model_name=model_name,
+                                              sample_images=sample_images)
+    else:
+        _worker_state["model"] = get_backend(backend, model_name, sample_images)
+    _worker_state["fast_preprocess"] = fast_preprocess
+
+def _classify_chunk(chunk):
+    from utils.image_classifier.classifier import iter_classified
+
+    if "init_error" in _worker_state:
+        raise RuntimeError(f"Nie udało się przygotować modelu w procesie roboczym: {_worker_state['init_error']}")
+    return list(iter_classified(
+        chunk,
+        _worker_state["model"],
+        _worker_state["feature_extractor"],
+        batch_size=len(chunk),
+        prefetch=False,
+        fast_preprocess=_worker_state["fast_preprocess"],
+    ))
+
+def iter_classified_parallel(files, workers, batch_size=CLASSIFICATION_BATCH_SIZE, backend=INFERENCE_BACKEND,
+                             fast_preprocess=FAST_PREPROCESS_ENABLED, cascade=CASCADE_ENABLED,
+                             cascade_threshold=CASCADE_THRESHOLD, model_name=MODEL_NAME, sample_images=None):
+    """
+    Klasyfikuje pliki w `workers` procesach, każdy z własną kopią modelu.
+
+    Pliki są dzielone na partie po `batch_size`, a procesy pobierają kolejne partie
+    ze wspólnej kolejki zadań, gdy tylko skończą poprzednią - szybszy proces wykona
+    więcej pracy. Naraz zlecanych jest co najwyżej `CLASSIFICATION_BATCHES_PER_WORKER`
+    partii na proces, więc pliki są odczytywane z `files` w tempie klasyfikacji.
+    Wyniki zwracane są jako pary (ścieżka, etykieta) w kolejności wejściowej.
+    `sample_images` służą do sprawdzenia zgodności silnika z modelem eager (patrz `load_backend`).
+
+    Awaryjne zakończenie procesu roboczego przerywa klasyfikację wyjątkiem RuntimeError zamiast
+    zawieszać ją w oczekiwaniu na wynik; błąd ładowania modelu w procesie roboczym jest
+    zgłaszany z jego pierwotnym komunikatem.
+    """
+    from utils.image_classifier.classifier import iter_batches
+
+    context = multiprocessing.get_context("spawn")
+    threads = threads_per_worker(workers)
+    window = max(1, workers) * CLASSIFICATION_BATCHES_PER_WORKER
+    pending = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(threads, backend, fast_preprocess, cascade, cascade_threshold, model_name, sample_images),
+    ) as executor:
+        try:
+            for batch in iter_batches(files, max(1, batch_size)):
+                pending.append(executor.submit(_classify_chunk, batch))
+                if len(pending) >= window:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        except BrokenProcessPool as e:
+            raise RuntimeError("Proces roboczy klasyfikacji zakończył się nieoczekiwanie - sprawdź komunikaty "
+                               "procesów roboczych powyżej (przyczyną może być np. brak pamięci).") from e
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from utils.image_classifier.config import PREFETCH_WORKERS, PREFETCH_QUEUE_SIZE
+
+class StageStats:
+    """
+    Sumaryczne czasy etapów potoku (bezpieczne dla wielu wątków).
+
+    Przy `keep_samples=True` zapamiętywany jest też czas każdego pomiaru, co pozwala
+    wyznaczyć percentyle opóźnień (patrz `percentiles`).
+    """
+
+    def __init__(self, keep_samples=False):
+        self._lock = threading.Lock()
+        self.totals = {}
+        self.counts = {}
+        self.samples = {} if keep_samples else None
+
+    def add(self, stage, seconds, count=1):
+        with self._lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + count
+            if self.samples is not None:
+                self.samples.setdefault(stage, []).append(seconds)
+
+    def percentiles(self, stage, percents=(50, 90, 99)):
+        """
+        Percentyle czasu pojedynczego pomiaru etapu w sekundach (słownik percent -> czas).
+        """
+        with self._lock:
+            values = list((self.samples or {}).get(stage, []))
+        if not values:
+            return {}
+        return dict(zip(percents, np.percentile(values, percents).tolist()))
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                stage: {"total_s": total, "count": self.counts[stage]}
+                for stage, total in self.totals.items()
+            }
+
+    def summary(self):
+        lines = []
+        for stage, values in self.as_dict().items():
+            per_item = values["total_s"] / values["count"] * 1000 if values["count"] else 0.0
+            lines.append(f"{stage}: {values['total_s']:.2f}s ({values['count']} szt., {per_item:.1f} ms/szt.)")
+        return "\n".join(lines)
+
+
+class PrefetchPipeline:
+    """
+    Potok producent/konsument: pula wątków dekoduje i przetwarza obrazy z wyprzedzeniem,
+    a wątek wywołujący odbiera gotowe wyniki w kolejności wejściowej.
+
+    Elementy wejściowe pobierane są w wątku wywołującym, który zleca dekodowanie co najwyżej
+    `queue_size` elementów naprzód. Zapewnia to backpressure - dekodowanie wstrzymuje się,
+    gdy konsument (inferencja) nie nadąża, a pamięć zajmuje co najwyżej `queue_size`
+    przygotowanych obrazów. Kod generatora `items` (np. zapis wyników, pamięć podręczna)
+    działa więc zawsze w tym samym wątku co konsument.
+    """
+
+    def __init__(self, decode, preprocess, workers=PREFETCH_WORKERS, queue_size=PREFETCH_QUEUE_SIZE, stats=None):
+        self.decode = decode
+        self.preprocess = preprocess
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.stats = stats if stats is not None else StageStats()
+
+        self._pending = deque()  # (element, future) w kolejności wejściowej
+        self._executor = None
+
+    def _task(self, item):
+        start = time.perf_counter()
+        decoded = self.decode(item)
+        decoded_at = time.perf_counter()
+        self.stats.add("decode", decoded_at - start)
+        if self.preprocess is None:
+            return decoded
+        result = self.preprocess(decoded)
+        self.stats.add("preprocess", time.perf_counter() - decoded_at)
+        return result
+
+    def run(self, items):
+        """
+        Zwraca generator krotek (element, wynik, błąd) w kolejności elementów wejściowych.
+
+        Błąd dekodowania lub przetwarzania jednego elementu jest zwracany w polu `błąd`
+        i nie przerywa potoku. Wyjątek zgłoszony przez samo `items` (np. błąd odczytu
+        katalogu) jest zgłaszany ponownie po elementach już podanych.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prefetch")
+        iterator = iter(items)
+        exhausted = False
+        feed_error = None
+
+        try:
+            while True:
+                while not exhausted and len(self._pending) < self.queue_size:
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        exhausted = True
+                    except Exception as e:
+                        exhausted, feed_error = True, e
+                    else:
+                        self._pending.append((item, self._executor.submit(self._task, item)))
+                if not self._pending:
+                    break
+
+                wait_start = time.perf_counter()
+                item, future = self._pending.popleft()
+                try:
+                    value, error = future.result(), None
+                except Exception as e:
+                    value, error = None, e
+                self.stats.add("wait", time.perf_counter() - wait_start)
+                yield item, value, error
+
+            if feed_error is not None:
+                raise feed_error
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Anuluje oczekujące zadania i zwalnia pulę wątków.
+        """
+        while self._pending:
+            self._pending.popleft()[1].cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
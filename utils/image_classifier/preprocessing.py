@@ -0,0 +1,102 @@
+import numpy as np
+import torch
+from PIL import Image
+from utils.image_classifier.config import FAST_PREPROCESS_TOLERANCE
+
+# Dekodowanie z rozdzielczością co najmniej N razy większą od docelowej,
+# aby końcowe skalowanie nadal wygładzało obraz podobnie jak pełne dekodowanie
+DECODE_OVERSAMPLE = 2
+
+
+class FastPreprocessor:
+    """
+    Szybka alternatywa dla wywołania `ViTImageProcessor` na każdym obrazie.
+
+    Pliki JPEG są dekodowane od razu w zmniejszonej rozdzielczości (`Image.draft`),
+    pozostałe formaty zmniejszane są tanio przez `Image.reduce`. Przeskalowanie do
+    rozmiaru wejściowego modelu odbywa się w PIL dla każdego obrazu (obrazy mają różne
+    rozmiary źródłowe), a przeskalowanie wartości i normalizacja wykonywane są jedną
+    wektorową operacją NumPy na całej partii.
+
+    Parametry (rozmiar, średnia, odchylenie, współczynnik skalowania) są odczytywane
+    z przekazanego procesora, więc wynik odpowiada mu z dokładnością do tolerancji
+    (patrz `compare_with_processor`).
+    """
+
+    def __init__(self, feature_extractor):
+        size = getattr(feature_extractor, "size", None) or {"height": 224, "width": 224}
+        self.height = size.get("height", size.get("shortest_edge", 224))
+        self.width = size.get("width", size.get("shortest_edge", 224))
+        self.resample = getattr(feature_extractor, "resample", Image.BILINEAR)
+
+        rescale_factor = getattr(feature_extractor, "rescale_factor", 1 / 255) if getattr(
+            feature_extractor, "do_rescale", True) else 1.0
+        if getattr(feature_extractor, "do_normalize", True):
+            mean = np.asarray(getattr(feature_extractor, "image_mean", [0.5, 0.5, 0.5]), dtype=np.float32)
+            std = np.asarray(getattr(feature_extractor, "image_std", [0.5, 0.5, 0.5]), dtype=np.float32)
+        else:
+            mean = np.zeros(3, dtype=np.float32)
+            std = np.ones(3, dtype=np.float32)
+
+        # (x * rescale - mean) / std  ==  x * scale + shift
+        self.scale = (rescale_factor / std).astype(np.float32)
+        self.shift = (-mean / std).astype(np.float32)
+
+    def decode(self, image_path):
+        """
+        Dekoduje obraz blisko docelowej rozdzielczości i zwraca tablicę uint8 (H, W, 3).
+        """
+        target = (self.width * DECODE_OVERSAMPLE, self.height * DECODE_OVERSAMPLE)
+        box = None
+        with Image.open(image_path) as image:
+            if image.format == "JPEG":
+                # Obszar oryginału we współrzędnych zmniejszonego obrazu (rozmiar draft jest zaokrąglany w górę)
+                _, box = image.draft("RGB", target) or (None, None)
+            image = image.convert("RGB")
+
+        # reducing_gap: najpierw tanie zmniejszenie o całkowity współczynnik, ale z korektą
+        # geometrii ułamkowej reszty (ręczne `reduce` przesuwało obraz względem procesora HF)
+        image = image.resize((self.width, self.height), resample=self.resample, box=box,
+                             reducing_gap=DECODE_OVERSAMPLE)
+        return np.asarray(image, dtype=np.uint8)
+
+    def normalize_batch(self, arrays):
+        """
+        Przeskalowuje i normalizuje partię tablic uint8 (H, W, 3) do float32 (N, 3, H, W).
+        """
+        batch = np.stack(arrays).astype(np.float32)
+        batch *= self.scale
+        batch += self.shift
+        return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+    def collate(self, arrays):
+        """
+        Składa partię do tensora `pixel_values` przyjmowanego przez model.
+        """
+        return torch.from_numpy(self.normalize_batch(arrays))
+
+
+def compare_with_processor(image_paths, feature_extractor):
+    """
+    Porównuje wynik `FastPreprocessor` z oryginalnym procesorem Hugging Face.
+
+    Returns:
+        dict: Największa (`max_abs`) i średnia (`mean_abs`) bezwzględna różnica
+        wartości pikseli po normalizacji oraz `within_tolerance` - czy największa
+        różnica nie przekracza `FAST_PREPROCESS_TOLERANCE`.
+    """
+    fast = FastPreprocessor(feature_extractor)
+    fast_values = fast.normalize_batch([fast.decode(path) for path in image_paths])
+
+    reference = []
+    for path in image_paths:
+        with Image.open(path) as image:
+            reference.append(feature_extractor(images=image.convert("RGB"), return_tensors="np")["pixel_values"][0])
+
+    difference = np.abs(fast_values - np.stack(reference))
+    max_abs = float(difference.max())
+    return {
+        "max_abs": max_abs,
+        "mean_abs": float(difference.mean()),
+        "within_tolerance": max_abs <= FAST_PREPROCESS_TOLERANCE,
+    }
@@ -0,0 +1,223 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from utils.image_classifier.config import RESULT_CACHE_PATH, RESULT_CACHE_MAX_ENTRIES
+
+HASH_CHUNK_SIZE = 1024 * 1024
+COMMIT_EVERY = 500
+FAST_PREPROCESS_SUFFIX = "+fast"
+
+
+def content_hash(file_path):
+    """
+    Zwraca skrót BLAKE2b zawartości pliku.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def backend_key(backend, fast_preprocess=False):
+    """
+    Klucz silnika w pamięci podręcznej: etykiety z szybkiego przetwarzania wstępnego
+    mogą się różnić od etykiet z ViTImageProcessor, więc są przechowywane osobno.
+    """
+    return f"{backend}{FAST_PREPROCESS_SUFFIX}" if fast_preprocess else backend
+
+
+class ResultCache:
+    """
+    Trwała pamięć podręczna etykiet, kluczowana skrótem zawartości obrazu, nazwą modelu
+    i silnikiem wraz z trybem przetwarzania wstępnego (patrz `backend_key`).
+
+    Skróty plików są dodatkowo zapamiętywane według (ścieżka, rozmiar, czas modyfikacji),
+    dzięki czemu ponowne uruchomienie na niezmienionym folderze nie czyta zawartości plików.
+    Po przekroczeniu `max_entries` usuwane są najdawniej używane wpisy.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_entries=RESULT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pending_writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                content_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                backend TEXT NOT NULL,
+                label TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (content_hash, model, backend)
+            );
+            CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+            CREATE TABLE IF NOT EXISTS file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL
+            );
+        """)
+
+    def file_hash(self, file_path):
+        """
+        Zwraca skrót zawartości pliku, licząc go tylko, gdy plik zmienił się od ostatniego razu.
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, content_hash FROM file_hashes WHERE path = ?", (path,)
+            ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        digest = content_hash(path)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime_ns, content_hash) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest),
+            )
+            self._maybe_commit()
+        return digest
+
+    def get(self, file_path, model, backend):
+        """
+        Zwraca zapamiętaną etykietę pliku albo None.
+        """
+        try:
+            digest = self.file_hash(file_path)
+        except OSError:
+            self.misses += 1
+            return None
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT label FROM results WHERE content_hash = ? AND model = ? AND backend = ?",
+                (digest, model, backend),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute(
+                "UPDATE results SET last_used = ? WHERE content_hash = ? AND model = ? AND backend = ?",
+                (time.time(), digest, model, backend),
+            )
+            self._maybe_commit()
+        self.hits += 1
+        return row[0]
+
+    def put(self, file_path, model, backend, label):
+        try:
+            digest = self.file_hash(file_path)
+        except OSError:
+            return
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (content_hash, model, backend, label, last_used) VALUES (?, ?, ?, ?, ?)",
+                (digest, model, backend, label, time.time()),
+            )
+            self._maybe_commit()
+
+    def invalidate(self, model=None, backend=None):
+        """
+        Usuwa wpisy dla modelu i/lub silnika (w obu trybach przetwarzania wstępnego; bez argumentów
+        - wszystkie). Zwraca liczbę usuniętych wpisów.
+        """
+        query = "DELETE FROM results"
+        conditions, params = [], []
+        if model is not None:
+            conditions.append("model = ?")
+            params.append(model)
+        if backend is not None:
+            conditions.append("backend IN (?, ?)")
+            params.extend([backend, backend_key(backend, fast_preprocess=True)])
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        with self._lock:
+            removed = self._connection.execute(query, params).rowcount
+            if not conditions:
+                self._connection.execute("DELETE FROM file_hashes")
+            self._connection.commit()
+        return removed
+
+    def evict(self):
+        """
+        Usuwa najdawniej używane wpisy ponad limit `max_entries` oraz skróty plików,
+        do których nie odnosi się już żaden wpis. Zwraca liczbę usuniętych wpisów wyników.
+        """
+        if not self.max_entries:
+            return 0
+        with self._lock:
+            count = self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            excess = max(0, count - self.max_entries)
+            if excess:
+                self._connection.execute(
+                    "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+            hashes = self._connection.execute("SELECT COUNT(*) FROM file_hashes").fetchone()[0]
+            if excess or hashes > self.max_entries:
+                self._connection.execute(
+                    "DELETE FROM file_hashes WHERE content_hash NOT IN (SELECT content_hash FROM results)"
+                )
+            self._connection.commit()
+        return excess
+
+    def entry_count(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def summary(self):
+        total = self.hits + self.misses
+        hit_rate = self.hits / total if total else 0.0
+        return f"Pamięć podręczna wyników: {self.hits} trafień, {self.misses} chybień ({hit_rate:.1%})"
+
+    def close(self):
+        self.evict()
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def _maybe_commit(self):
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_EVERY:
+            self._connection.commit()
+            self._pending_writes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Zarządzanie pamięcią podręczną wyników klasyfikacji obrazów.")
+    parser.add_argument("command", choices=["stats", "invalidate", "evict"])
+    parser.add_argument("--model", help="Usuń tylko wpisy tego modelu")
+    parser.add_argument("--backend", help="Usuń tylko wpisy tego silnika")
+    parser.add_argument("--path", default=RESULT_CACHE_PATH, help="Ścieżka bazy SQLite")
+    args = parser.parse_args()
+
+    with ResultCache(args.path) as cache:
+        if args.command == "stats":
+            print(f"Wpisów: {cache.entry_count()} (limit: {cache.max_entries})")
+        elif args.command == "invalidate":
+            print(f"Usunięto wpisów: {cache.invalidate(args.model, args.backend)}")
+        elif args.command == "evict":
+            print(f"Usunięto wpisów: {cache.evict()}")
@@ -0,0 +1,134 @@
+import csv
+import json
+import os
+import threading
+import time
+from utils.image_classifier.config import RESULT_FLUSH_EVERY
+
+FORMATS = ("txt", "csv", "jsonl")
+
+
+def infer_format(output_path):
+    """
+    Wybiera format pliku wynikowego na podstawie rozszerzenia (domyślnie `nazwa: etykieta`).
+    """
+    extension = os.path.splitext(output_path)[1].lower().lstrip(".")
+    return extension if extension in ("csv", "jsonl") else "txt"
+
+def iter_results(result_path, output_format=None):
+    """
+    Generator par (nazwa pliku, etykieta) odczytanych z pliku wynikowego w dowolnym formacie.
+
+    Niedokończona ostatnia linia (np. po przerwaniu zapisu) jest pomijana.
+    """
+    output_format = output_format or infer_format(result_path)
+    with open(result_path, "r", encoding="utf-8", newline="") as f:
+        if output_format == "csv":
+            for row in csv.DictReader(f):
+                if row.get("label") is not None:
+                    yield row["file"], row["label"]
+            return
+
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            if output_format == "jsonl":
+                entry = json.loads(line)
+                yield entry["file"], entry["label"]
+            else:
+                file_name, _, label = line.partition(": ")
+                yield file_name, label
+
+
+class ResultWriter:
+    """
+    Zapisuje wyniki klasyfikacji przyrostowo, zamiast trzymać je w pamięci do końca przebiegu.
+
+    Co `flush_every` wpisów plik jest opróżniany na dysk, a obok niego zapisywany jest
+    punkt kontrolny (`<plik>.checkpoint`) z liczbą zapisanych wpisów. W trybie `resume`
+    istniejący plik jest dopisywany, a `done` zawiera nazwy plików, które już mają wynik.
+    """
+
+    def __init__(self, output_path, output_format=None, resume=False, flush_every=RESULT_FLUSH_EVERY):
+        self.output_path = output_path
+        self.output_format = output_format or infer_format(output_path)
+        if self.output_format not in FORMATS:
+            raise ValueError(f"Nieobsługiwany format wyników: {self.output_format}. Dostępne: {', '.join(FORMATS)}.")
+        self.flush_every = max(1, flush_every)
+        self.checkpoint_path = f"{output_path}.checkpoint"
+        self.written = 0
+        self.done = set()
+        self._lock = threading.Lock()
+
+        resuming = resume and os.path.exists(output_path) and os.path.getsize(output_path) > 0
+        if resuming:
+            self._truncate_partial_line()
+            self.done = {file_name for file_name, _ in iter_results(output_path, self.output_format)}
+
+        self._file = open(output_path, "a" if resuming else "w", encoding="utf-8", newline="")
+        self._csv = csv.writer(self._file) if self.output_format == "csv" else None
+        if self._csv is not None and not resuming:
+            self._csv.writerow(["file", "label"])
+
+    def _truncate_partial_line(self):
+        with open(self.output_path, "rb+") as f:
+            data_end = f.seek(0, os.SEEK_END)
+            position = data_end
+            while position > 0:
+                f.seek(position - 1)
+                if f.read(1) == b"\n":
+                    break
+                position -= 1
+            if position != data_end:
+                f.truncate(position)
+
+    def write(self, file_name, label):
+        with self._lock:
+            if self.output_format == "csv":
+                self._csv.writerow([file_name, label])
+            elif self.output_format == "jsonl":
+                self._file.write(json.dumps({"file": file_name, "label": label}, ensure_ascii=False) + "\n")
+            else:
+                self._file.write(f"{file_name}: {label}\n")
+
+            self.written += 1
+            if self.written % self.flush_every == 0:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "output": self.output_path,
+                "format": self.output_format,
+                "written": self.written,
+                "previously_done": len(self.done),
+                "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+    def close(self, completed=True):
+        """
+        Zamyka plik; po udanym zakończeniu punkt kontrolny jest usuwany.
+        """
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        if completed and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(completed=exc_type is None)
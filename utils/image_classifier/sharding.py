@@ -0,0 +1,89 @@
+import argparse
+import hashlib
+import os
+from utils.image_classifier.result_writer import ResultWriter, iter_results
+
+
+def shard_of(key, shard_count):
+    """
+    Zwraca numer fragmentu (0..shard_count-1) dla klucza, stały między maszynami i uruchomieniami.
+    """
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+def shard_key(file_path, root=None):
+    """
+    Klucz pliku niezależny od punktu montowania: ścieżka względna wobec `root` z ukośnikami.
+    """
+    if root:
+        file_path = os.path.relpath(file_path, root)
+    return file_path.replace(os.sep, "/")
+
+def select_shard(files, shard_index, shard_count, root=None):
+    """
+    Filtruje pliki należące do fragmentu `shard_index` z `shard_count`.
+
+    Podział opiera się na skrócie ścieżki, więc każdy węzeł wyznacza swój fragment
+    samodzielnie, bez koordynacji, a suma wszystkich fragmentów daje pełną listę plików.
+    """
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"Nieprawidłowy fragment: {shard_index}/{shard_count}.")
+
+    for file_path in files:
+        if shard_of(shard_key(file_path, root), shard_count) == shard_index:
+            yield file_path
+
+def merge_results(result_paths, output_path, expected_names=None):
+    """
+    Łączy pliki wynikowe poszczególnych fragmentów w jeden plik.
+
+    Args:
+        result_paths (list): Pliki wynikowe fragmentów (txt, csv lub jsonl).
+        output_path (str): Ścieżka połączonego pliku wynikowego (format wg rozszerzenia).
+        expected_names (iterable): Opcjonalne nazwy plików, które powinny się znaleźć w wyniku.
+
+    Returns:
+        dict: Liczba wpisów oraz listy duplikatów (`duplicates`) i brakujących plików (`missing`).
+    """
+    merged = {}
+    duplicates = []
+
+    for result_path in result_paths:
+        for file_name, label in iter_results(result_path):
+            if file_name in merged:
+                duplicates.append((file_name, result_path))
+                continue
+            merged[file_name] = label
+
+    with ResultWriter(output_path) as writer:
+        for file_name, label in merged.items():
+            writer.write(file_name, label)
+
+    missing = sorted(set(expected_names) - merged.keys()) if expected_names is not None else []
+    return {"entries": len(merged), "duplicates": duplicates, "missing": missing}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Łączenie wyników klasyfikacji z wielu fragmentów.")
+    parser.add_argument("output", help="Plik wynikowy po połączeniu")
+    parser.add_argument("results", nargs="+", help="Pliki wynikowe fragmentów")
+    parser.add_argument("--expected-dir", help="Folder z obrazami do wykrycia brakujących wpisów")
+    parser.add_argument("--recursive", action="store_true", help="Uwzględnij obrazy w podfolderach")
+    args = parser.parse_args()
+
+    expected = None
+    if args.expected_dir:
+        from utils.image_classifier.discovery import iter_image_files
+        expected = [
+            os.path.relpath(path, args.expected_dir).replace(os.sep, "/")
+            for path in iter_image_files(args.expected_dir, recursive=args.recursive)
+        ]
+
+    report = merge_results(args.results, args.output, expected)
+    print(f"Połączono wpisów: {report['entries']}")
+    print(f"Duplikaty: {len(report['duplicates'])}")
+    for file_name, result_path in report["duplicates"]:
+        print(f"  - {file_name} ({result_path})")
+    print(f"Brakujące: {len(report['missing'])}")
+    for file_name in report["missing"]:
+        print(f"  - {file_name}")
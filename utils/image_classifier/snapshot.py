@@ -0,0 +1,91 @@
+import argparse
+import os
+import shutil
+import time
+import torch
+from safetensors.torch import load_file
+from transformers import ViTConfig, ViTForImageClassification, ViTImageProcessor
+from utils.image_classifier.config import HUGGING_FACE_API_TOKEN, MODEL_NAME, MODEL_SNAPSHOT_DIR
+
+WEIGHTS_FILE = "model.safetensors"
+CONFIG_FILE = "config.json"
+
+
+def snapshot_path(model_name=MODEL_NAME, directory=MODEL_SNAPSHOT_DIR):
+    return os.path.join(directory, model_name.replace("/", "--"))
+
+def has_snapshot(model_name=MODEL_NAME, directory=MODEL_SNAPSHOT_DIR):
+    path = snapshot_path(model_name, directory)
+    return os.path.exists(os.path.join(path, WEIGHTS_FILE)) and os.path.exists(os.path.join(path, CONFIG_FILE))
+
+def export_snapshot(model_name=MODEL_NAME, processor_name=None, directory=MODEL_SNAPSHOT_DIR):
+    """
+    Jednorazowo pobiera model z Hugging Face Hub i zapisuje go lokalnie: wagi w jednym pliku
+    safetensors oraz konfigurację modelu i procesora obrazów. Katalog można potem skopiować
+    na hosty bez dostępu do sieci (zmienna IMAGE_CLASSIFIER_SNAPSHOT_DIR).
+
+    Returns:
+        str: Ścieżka katalogu z kopią modelu.
+    """
+    if not HUGGING_FACE_API_TOKEN:
+        raise ValueError("Token Hugging Face nie został ustawiony w pliku .env.")
+
+    target = snapshot_path(model_name, directory)
+    temp_path = f"{target}.tmp"
+    shutil.rmtree(temp_path, ignore_errors=True)
+
+    model = ViTForImageClassification.from_pretrained(model_name, token=HUGGING_FACE_API_TOKEN)
+    # Jeden plik wag, aby cały model dało się zmapować jednym wywołaniem mmap
+    model.save_pretrained(temp_path, safe_serialization=True, max_shard_size="1000GB")
+    processor = ViTImageProcessor.from_pretrained(processor_name or model_name, token=HUGGING_FACE_API_TOKEN)
+    processor.save_pretrained(temp_path)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(temp_path, target)
+    return target
+
+def load_snapshot(model_name=MODEL_NAME, directory=MODEL_SNAPSHOT_DIR):
+    """
+    Ładuje model i procesor obrazów z lokalnej kopii, bez połączenia z siecią.
+
+    Model tworzony jest bez alokacji wag (urządzenie "meta"), a parametry są podpinane
+    bezpośrednio pod tensory pliku safetensors, który biblioteka safetensors mapuje
+    do pamięci (strony pliku współdzielone przez procesy ładujące ten sam model).
+    """
+    path = snapshot_path(model_name, directory)
+    config = ViTConfig.from_pretrained(path, local_files_only=True)
+    with torch.device("meta"):
+        model = ViTForImageClassification(config)
+    model.load_state_dict(load_file(os.path.join(path, WEIGHTS_FILE)), strict=False, assign=True)
+
+    if any(tensor.is_meta for tensor in [*model.parameters(), *model.buffers()]):
+        # Wagi spoza pliku (np. bufory nieutrwalane) - zwykłe ładowanie, nadal lokalne
+        model = ViTForImageClassification.from_pretrained(path, local_files_only=True)
+    model.eval()
+
+    feature_extractor = ViTImageProcessor.from_pretrained(path, local_files_only=True)
+    return model, feature_extractor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokalna kopia modelu ViT do pracy bez dostępu do sieci.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Pobierz model i zapisz go lokalnie")
+    export_parser.add_argument("--model", default=MODEL_NAME)
+    export_parser.add_argument("--processor")
+    export_parser.add_argument("--directory", default=MODEL_SNAPSHOT_DIR)
+    load_parser = subparsers.add_parser("load", help="Zmierz czas ładowania lokalnej kopii")
+    load_parser.add_argument("--model", default=MODEL_NAME)
+    load_parser.add_argument("--directory", default=MODEL_SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        print(f"Zapisano kopię modelu w {export_snapshot(args.model, args.processor, args.directory)}")
+    else:
+        start = time.perf_counter()
+        model, feature_extractor = load_snapshot(args.model, args.directory)
+        loaded = time.perf_counter() - start
+        with torch.inference_mode():
+            size = model.config.image_size
+            model(pixel_values=torch.zeros(1, 3, size, size))
+        print(f"Załadowano model w {loaded:.2f}s, pierwsza predykcja po {time.perf_counter() - start:.2f}s")
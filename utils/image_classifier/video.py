@@ -0,0 +1,242 @@
+import argparse
+import csv
+import json
+import os
+import time
+import numpy as np
+from utils.image_classifier.backends import get_backend
+from utils.image_classifier.classifier import iter_batches, predict_labels, result_name
+from utils.image_classifier.dedupe import HASH_SIZE, dhash_arrays
+from utils.image_classifier.discovery import iter_video_files, VIDEO_EXTENSIONS
+from utils.image_classifier.model_loader import get_model
+from utils.image_classifier.preprocessing import FastPreprocessor
+from utils.image_classifier.result_writer import infer_format
+from utils.image_classifier.config import (
+    CLASSIFICATION_BATCH_SIZE,
+    INFERENCE_BACKEND,
+    VIDEO_SAMPLING,
+    VIDEO_SAMPLE_INTERVAL,
+    VIDEO_SCENE_THRESHOLD,
+)
+
+SAMPLING_MODES = ("interval", "scene")
+
+
+def _import_av():
+    try:
+        import av
+    except ImportError:
+        raise ImportError("Klasyfikacja wideo wymaga pakietu av (pip install av).")
+    return av
+
+def _interval_frames(container, stream, interval, convert, counters):
+    # Pakiety są tylko demultipleksowane (bez dekodowania), a dekodowane są dopiero pakiety od
+    # ostatniej klatki kluczowej przed próbką do samej próbki. Przy odstępie nie mniejszym niż
+    # GOP dekodowana jest więc co najwyżej jedna GOP na próbkę zamiast wszystkich klatek filmu
+    time_base = stream.time_base
+    gop = []  # Niezdekodowane pakiety od ostatniej klatki kluczowej
+    decoding = False  # Czy dekoder czeka jeszcze na klatkę bieżącej próbki
+    target = 0.0
+
+    def decode(packets):
+        nonlocal target, decoding
+        for packet in packets:
+            for frame in stream.decode(packet):
+                counters["decoded"] = counters.get("decoded", 0) + 1
+                # Klatki opróżniane z dekodera nie mają ustawionej podstawy czasu, więc czas liczymy z pts
+                frame_time = None if frame.pts is None else float(frame.pts * time_base)
+                if frame_time is None or frame_time < target:
+                    continue
+                yield frame_time, convert(frame)
+                while target <= frame_time:
+                    target += interval
+                decoding = False
+
+    for packet in container.demux(stream):
+        if packet.size == 0:
+            continue
+        if packet.is_keyframe and not decoding:
+            gop = []
+        gop.append(packet)
+        if not decoding and (packet.pts is None or packet.pts * time_base < target):
+            continue
+        decoding = True
+        packets, gop = gop, []
+        yield from decode(packets)
+
+    # Koniec pliku: pozostałe pakiety i klatki wstrzymane w dekoderze (np. klatki B)
+    if decoding or gop:
+        yield from decode(gop + [None])
+
+def _scene_frames(container, stream, threshold, convert, counters):
+    # Dekodowane są tylko klatki kluczowe; próbką zostaje pierwsza klatka każdej nowej sceny
+    stream.codec_context.skip_frame = "NONKEY"
+    previous = None
+    for frame in container.decode(stream):
+        counters["decoded"] = counters.get("decoded", 0) + 1
+        if frame.time is None:
+            continue
+        value = dhash_arrays([frame.to_ndarray(width=HASH_SIZE + 1, height=HASH_SIZE, format="gray")])[0]
+        if previous is None or int(np.bitwise_count(value ^ previous)) > threshold:
+            yield frame.time, convert(frame)
+        previous = value
+
+def sample_frames(video_path, width, height, sampling=VIDEO_SAMPLING, interval=VIDEO_SAMPLE_INTERVAL,
+                  scene_threshold=VIDEO_SCENE_THRESHOLD, counters=None):
+    """
+    Generator par (czas w sekundach, klatka uint8 (H, W, 3)) próbkowanych z filmu.
+
+    Klatki są skalowane do rozmiaru wejściowego modelu już przy konwersji z formatu
+    dekodera, bez tworzenia pełnowymiarowych obrazów.
+
+    Args:
+        sampling (str): "interval" - klatka co `interval` sekund; "scene" - pierwsza klatka
+            kluczowa każdej sceny (zmiana dHash większa niż `scene_threshold`).
+        counters (dict): Opcjonalny słownik, w którym pod kluczem `decoded` zliczane są
+            wszystkie zdekodowane klatki (także niepróbkowane).
+    """
+    if sampling not in SAMPLING_MODES:
+        raise ValueError(f"Nieznany tryb próbkowania: {sampling}. Dostępne: {', '.join(SAMPLING_MODES)}.")
+    av = _import_av()
+
+    def convert(frame):
+        return frame.to_ndarray(width=width, height=height, format="rgb24")
+
+    counters = counters if counters is not None else {}
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        if sampling == "scene":
+            yield from _scene_frames(container, stream, scene_threshold, convert, counters)
+        else:
+            yield from _interval_frames(container, stream, max(interval, 1e-3), convert, counters)
+
+def video_duration(video_path):
+    av = _import_av()
+    with av.open(video_path) as container:
+        if container.duration is None:
+            return None
+        return container.duration / av.time_base
+
+def build_timeline(samples, duration=None):
+    """
+    Łączy kolejne próbki z tą samą etykietą w segmenty.
+
+    Args:
+        samples (list): Pary (czas, etykieta) w kolejności czasu.
+        duration (float): Długość filmu; koniec ostatniego segmentu (domyślnie czas ostatniej próbki).
+
+    Returns:
+        list: Słowniki {"start", "end", "label", "samples"}.
+    """
+    segments = []
+    for sample_time, label in samples:
+        if segments and segments[-1]["label"] == label:
+            segments[-1]["samples"] += 1
+            continue
+        if segments:
+            segments[-1]["end"] = sample_time
+        segments.append({"start": sample_time, "end": sample_time, "label": label, "samples": 1})
+
+    if segments:
+        segments[-1]["end"] = max(segments[-1]["end"], duration or 0.0)
+    return segments
+
+def classify_video(video_path, model, feature_extractor, batch_size=CLASSIFICATION_BATCH_SIZE,
+                   sampling=VIDEO_SAMPLING, interval=VIDEO_SAMPLE_INTERVAL, scene_threshold=VIDEO_SCENE_THRESHOLD,
+                   counters=None):
+    """
+    Klasyfikuje próbkowane klatki filmu partiami i zwraca oś czasu etykiet (patrz `build_timeline`).
+    """
+    preprocessor = FastPreprocessor(feature_extractor)
+    frames = sample_frames(video_path, preprocessor.width, preprocessor.height, sampling, interval, scene_threshold,
+                           counters)
+
+    samples = []
+    for batch in iter_batches(frames, max(1, batch_size)):
+        labels = predict_labels(preprocessor.collate([frame for _, frame in batch]), model)
+        samples.extend((sample_time, label) for (sample_time, _), label in zip(batch, labels))
+    return build_timeline(samples, video_duration(video_path))
+
+def format_timestamp(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def write_timeline(f, output_format, name, segments):
+    for segment in segments:
+        if output_format == "jsonl":
+            f.write(json.dumps({"file": name, **segment}, ensure_ascii=False) + "\n")
+        elif output_format == "csv":
+            csv.writer(f).writerow([name, f"{segment['start']:.3f}", f"{segment['end']:.3f}", segment["label"],
+                                    segment["samples"]])
+        else:
+            f.write(f"{name} [{format_timestamp(segment['start'])} - {format_timestamp(segment['end'])}]: "
+                    f"{segment['label']}\n")
+
+def process_videos(input_path, output_path, sampling=VIDEO_SAMPLING, interval=VIDEO_SAMPLE_INTERVAL,
+                   scene_threshold=VIDEO_SCENE_THRESHOLD, batch_size=CLASSIFICATION_BATCH_SIZE,
+                   backend=INFERENCE_BACKEND, recursive=False):
+    """
+    Klasyfikuje filmy z listy plików lub folderu i zapisuje osie czasu etykiet.
+
+    Format pliku wynikowego zależy od rozszerzenia: txt (`nazwa [od - do]: etykieta`),
+    csv (`file,start,end,label,samples`) lub jsonl. Film, którego nie da się odczytać,
+    otrzymuje wpis z komunikatem błędu, a pozostałe są przetwarzane dalej.
+
+    Returns:
+        dict: Liczba filmów (`videos`), próbkowanych klatek (`frames`), wszystkich zdekodowanych
+        klatek (`decoded`) i segmentów (`segments`).
+    """
+    if isinstance(input_path, list):
+        root = None
+        files = [path for path in input_path if path.lower().endswith(VIDEO_EXTENSIONS)]
+    elif isinstance(input_path, str) and os.path.isdir(input_path):
+        root = input_path
+        files = iter_video_files(input_path, recursive)
+    else:
+        raise ValueError("Nieprawidłowa ścieżka wejściowa. Oczekiwano folderu lub listy plików.")
+
+    _, feature_extractor = get_model()
+    model = get_backend(backend)
+    output_format = infer_format(output_path)
+    counters = {"videos": 0, "frames": 0, "decoded": 0, "segments": 0}
+
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        if output_format == "csv":
+            csv.writer(f).writerow(["file", "start", "end", "label", "samples"])
+        for video_path in files:
+            name = result_name(video_path, root)
+            start = time.perf_counter()
+            video_counters = {"decoded": 0}
+            try:
+                segments = classify_video(video_path, model, feature_extractor, batch_size, sampling, interval,
+                                          scene_threshold, video_counters)
+            except Exception as e:
+                segments = [{"start": 0.0, "end": 0.0, "label": f"Błąd: {str(e)}", "samples": 0}]
+            write_timeline(f, output_format, name, segments)
+            f.flush()
+
+            frames = sum(segment["samples"] for segment in segments)
+            counters["videos"] += 1
+            counters["frames"] += frames
+            counters["decoded"] += video_counters["decoded"]
+            counters["segments"] += len(segments)
+            print(f"{name}: {frames} klatek ({video_counters['decoded']} zdekodowanych), {len(segments)} segmentów "
+                  f"({time.perf_counter() - start:.1f}s)")
+    return counters
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Klasyfikacja filmów na podstawie próbkowanych klatek.")
+    parser.add_argument("input", nargs="+", help="Folder lub pliki wideo")
+    parser.add_argument("output")
+    parser.add_argument("--sampling", choices=SAMPLING_MODES, default=VIDEO_SAMPLING)
+    parser.add_argument("--interval", type=float, default=VIDEO_SAMPLE_INTERVAL)
+    parser.add_argument("--scene-threshold", type=int, default=VIDEO_SCENE_THRESHOLD)
+    parser.add_argument("--backend", default=INFERENCE_BACKEND)
+    parser.add_argument("--recursive", action="store_true")
+    args = parser.parse_args()
+
+    input_path = args.input[0] if len(args.input) == 1 and os.path.isdir(args.input[0]) else args.input
+    print(process_videos(input_path, args.output, args.sampling, args.interval, args.scene_threshold,
+                         backend=args.backend, recursive=args.recursive))
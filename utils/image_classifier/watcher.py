@@ -0,0 +1,280 @@
+import argparse
+import os
+import queue
+import threading
+import time
+from utils.image_classifier.backends import get_backend
+from utils.image_classifier.classifier import iter_classified, result_name
+from utils.image_classifier.discovery import is_image_file
+from utils.image_classifier.model_loader import model_registry
+from utils.image_classifier.result_writer import ResultWriter
+from utils.image_classifier.config import (
+    CLASSIFICATION_BATCH_SIZE,
+    INFERENCE_BACKEND,
+    WATCH_BATCH_LATENCY,
+    WATCH_POLL_INTERVAL,
+    WATCH_SETTLE_TIME,
+    WATCH_FULL_RESCAN_INTERVAL,
+)
+
+
+class PollingSource:
+    """
+    Wykrywa nowe i zmienione pliki przez okresowe odpytywanie folderu.
+
+    Ponownie listowane są tylko katalogi, których czas modyfikacji się zmienił (dodanie,
+    usunięcie lub zmiana nazwy pliku); pełne sprawdzenie rozmiarów i czasów plików,
+    wykrywające zmiany w miejscu, odbywa się co `full_rescan_interval` sekund.
+    """
+
+    def __init__(self, folder, recursive=False, poll_interval=WATCH_POLL_INTERVAL,
+                 full_rescan_interval=WATCH_FULL_RESCAN_INTERVAL):
+        self.folder = folder
+        self.recursive = recursive
+        self.poll_interval = poll_interval
+        self.full_rescan_interval = full_rescan_interval
+        self._directories = {}  # katalog -> mtime_ns
+        self._subdirectories = {}  # katalog -> lista podkatalogów z ostatniego listowania
+        self._files = {}  # plik -> (rozmiar, mtime_ns)
+        self._last_full_scan = time.monotonic()
+        self._scan(full=True)
+
+    def existing_files(self):
+        return list(self._files)
+
+    def _scan(self, full):
+        changed = []
+        stack = [self.folder]
+        seen_directories = set()
+        while stack:
+            directory = stack.pop()
+            seen_directories.add(directory)
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            unchanged = self._directories.get(directory) == mtime
+            self._directories[directory] = mtime
+
+            if unchanged and not full:
+                stack.extend(self._subdirectories.get(directory, []))
+                continue
+
+            subdirectories = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive:
+                                subdirectories.append(entry.path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                        signature = (stat.st_size, stat.st_mtime_ns)
+                        if self._files.get(entry.path) != signature:
+                            self._files[entry.path] = signature
+                            changed.append(entry.path)
+            except OSError:
+                continue
+            self._subdirectories[directory] = subdirectories
+            stack.extend(subdirectories)
+
+        for directory in set(self._directories) - seen_directories:
+            del self._directories[directory]
+            self._subdirectories.pop(directory, None)
+        return changed
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, self.poll_interval))
+        full = time.monotonic() - self._last_full_scan >= self.full_rescan_interval
+        if full:
+            self._last_full_scan = time.monotonic()
+        return self._scan(full)
+
+    def close(self):
+        pass
+
+
+class InotifySource:
+    """
+    Wykrywa zmiany przez powiadomienia systemu plików (inotify w Linuksie) za pomocą pakietu watchdog.
+    """
+
+    def __init__(self, folder, recursive=False):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        self.folder = folder
+        self.recursive = recursive
+        self._events = queue.Queue()
+        events = self._events
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory or event.event_type not in ("created", "modified", "moved", "closed"):
+                    return
+                events.put(getattr(event, "dest_path", None) or event.src_path)
+
+        self._observer = Observer()
+        self._observer.schedule(Handler(), folder, recursive=recursive)
+        self._observer.start()
+
+    def existing_files(self):
+        files = []
+        for directory, subdirectories, names in os.walk(self.folder):
+            files.extend(os.path.join(directory, name) for name in names)
+            if not self.recursive:
+                break
+        return files
+
+    def poll(self, timeout):
+        paths = []
+        try:
+            paths.append(self._events.get(timeout=timeout))
+            while True:
+                paths.append(self._events.get_nowait())
+        except queue.Empty:
+            pass
+        return paths
+
+    def close(self):
+        self._observer.stop()
+        self._observer.join()
+
+
+def create_source(folder, recursive=False):
+    """
+    Zwraca źródło zdarzeń inotify (watchdog), a gdy nie jest dostępne - odpytywanie folderu.
+    """
+    try:
+        return InotifySource(folder, recursive)
+    except Exception:
+        return PollingSource(folder, recursive)
+
+
+class FolderWatcher:
+    """
+    Długotrwały tryb klasyfikacji: obserwuje folder i klasyfikuje nowe lub zmienione obrazy.
+
+    Model pozostaje załadowany przez cały czas działania. Nowe pliki są zbierane w partie
+    (do `batch_size` plików lub `latency` sekund od pierwszego z nich), klasyfikowane
+    i dopisywane do pliku wynikowego. Pliki nadal zapisywane (zmieniane w ciągu
+    `WATCH_SETTLE_TIME`) czekają do zakończenia zapisu.
+    """
+
+    def __init__(self, folder, output_path, recursive=False, batch_size=CLASSIFICATION_BATCH_SIZE,
+                 latency=WATCH_BATCH_LATENCY, backend=INFERENCE_BACKEND, initial_scan=True, on_result=None):
+        self.folder = folder
+        self.output_path = output_path
+        self.recursive = recursive
+        self.batch_size = max(1, batch_size)
+        self.latency = latency
+        self.backend = backend
+        self.initial_scan = initial_scan
+        self.on_result = on_result
+        self.classified = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = {}  # plik -> czas pierwszego zgłoszenia
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _ready_files(self):
+        now = time.monotonic()
+        ready = []
+        for path in list(self._pending):
+            try:
+                modified_ago = time.time() - os.stat(path).st_mtime
+            except OSError:
+                del self._pending[path]
+                continue
+            if modified_ago >= WATCH_SETTLE_TIME:
+                ready.append(path)
+
+        oldest = min((self._pending[path] for path in ready), default=now)
+        if len(ready) >= self.batch_size or (ready and now - oldest >= self.latency):
+            for path in ready:
+                del self._pending[path]
+            return ready
+        return []
+
+    def _classify(self, paths, model, feature_extractor, writer):
+        paths = [path for path in paths if is_image_file(path)]
+        written = 0
+        for path, label in iter_classified(paths, model, feature_extractor, self.batch_size, prefetch=False):
+            name = result_name(path, self.folder)
+            writer.write(name, label)
+            written += 1
+            if self.on_result is not None:
+                self.on_result(name, label)
+        self.classified += written
+        # Pusty zapis także odświeża punkt kontrolny, co w obserwowanym folderze wywołałoby kolejne zdarzenie
+        if written:
+            writer.flush()
+
+    def run(self):
+        # Model używany przez cały czas obserwowania nie jest zwalniany z powodu bezczynności
+        _, feature_extractor = model_registry.acquire()
+        try:
+            model = get_backend(self.backend)
+            source = create_source(self.folder, self.recursive)
+            writer = ResultWriter(self.output_path, resume=True)
+        except Exception:
+            model_registry.release()
+            raise
+        print(f"Obserwowanie folderu {self.folder} ({type(source).__name__})")
+
+        # Plik wynikowy i jego punkt kontrolny mogą leżeć w obserwowanym folderze
+        own_files = {os.path.abspath(path) for path in
+                     (self.output_path, writer.checkpoint_path, f"{writer.checkpoint_path}.tmp")}
+
+        def wanted(path):
+            return is_image_file(path) and os.path.abspath(path) not in own_files
+
+        try:
+            if self.initial_scan:
+                now = time.monotonic()
+                for path in source.existing_files():
+                    if wanted(path) and result_name(path, self.folder) not in writer.done:
+                        self._pending.setdefault(path, now)
+
+            while not self._stop.is_set():
+                for path in source.poll(timeout=min(self.latency, WATCH_POLL_INTERVAL)):
+                    if wanted(path):
+                        self._pending.setdefault(path, time.monotonic())
+
+                ready = self._ready_files()
+                while ready:
+                    self._classify(ready, model, feature_extractor, writer)
+                    ready = self._ready_files() if len(ready) >= self.batch_size else []
+        finally:
+            source.close()
+            writer.close()
+            model_registry.release()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ciągła klasyfikacja nowych obrazów w folderze.")
+    parser.add_argument("folder")
+    parser.add_argument("output")
+    parser.add_argument("--recursive", action="store_true")
+    parser.add_argument("--latency", type=float, default=WATCH_BATCH_LATENCY)
+    parser.add_argument("--backend", default=INFERENCE_BACKEND)
+    args = parser.parse_args()
+
+    watcher = FolderWatcher(args.folder, args.output, args.recursive, latency=args.latency, backend=args.backend,
+                            on_result=lambda name, label: print(f"{name}: {label}"))
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print(f"Zakończono. Sklasyfikowano obrazów: {watcher.classified}")
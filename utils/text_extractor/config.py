@@ -0,0 +1,42 @@
+import os
+
+# Równoległa ekstrakcja tekstu (pula procesów)
+EXTRACTION_WORKERS = 1  # Liczba procesów przetwarzających pliki (1 = bez dodatkowych procesów)
+EXTRACTION_IN_FLIGHT_PER_WORKER = 2  # Ile plików na proces jest zlecanych naraz (ogranicza ponowne próby po awarii procesu)
+
+# Ekstrakcja tekstu z PDF strona po stronie
+PDF_PAGE_WORKERS = min(8, os.cpu_count() or 1)  # Procesy przetwarzające zakresy stron dużego dokumentu
+PDF_PARALLEL_MIN_PAGES = 32  # Mniejsze dokumenty przetwarzane są w jednym procesie
+PDF_PAGES_PER_TASK = 16  # Liczba stron w jednym zadaniu procesu roboczego
+PDF_LANGUAGE_SAMPLE_CHARS = 20000  # Długość początku tekstu używanego do rozpoznania języka
+
+# OCR (Tesseract)
+OCR_LANGUAGES = {"eng": "en", "pol": "pl"}  # Języki Tesseract i odpowiadające im kody langdetect
+OCR_DEFAULT_LANGUAGE = "eng"
+# Wybór języka OCR: "combined" - jeden przebieg z modelem eng+pol, język ustalany z tekstu;
+# "trial" - próbny OCR środkowego pasa obrazu w każdym języku, potem jeden pełny przebieg;
+# "both" - pełny przebieg w każdym języku i wybór dłuższego wyniku (najwolniejsze)
+OCR_LANGUAGE_STRATEGY = "combined"
+OCR_TRIAL_CROP = 0.25  # Wysokość środkowego pasa (ułamek wysokości obrazu) w strategii "trial"
+
+# Silniki OCR: "tesserocr" - długo żyjące silniki w procesie (pip install tesserocr), obraz przekazywany
+# w pamięci; "pytesseract" - nowy proces tesseract i pliki tymczasowe przy każdym wywołaniu;
+# "auto" - tesserocr, jeśli jest zainstalowany
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")
+OCR_POOL_SIZE = os.cpu_count() or 1  # Maksymalna łączna liczba silników (wszystkie kombinacje języków)
+OCR_TESSDATA_PATH = os.getenv("TESSDATA_PREFIX")  # Katalog z danymi języków (domyślnie wbudowany w tesserocr)
+
+# Wstępne przetwarzanie obrazów przed OCR (NumPy)
+# Kroki: "deskew" - prostowanie metodą profilu projekcji, "rescale" - skalowanie do wysokości linii tekstu,
+# "binarize" - progowanie adaptacyjne; pusta krotka wyłącza przetwarzanie
+OCR_PREPROCESS_STEPS = ("deskew", "rescale", "binarize")
+OCR_PREPROCESS_COMPARE = False  # Dodatkowy OCR surowego obrazu, aby zmierzyć zysk czasu i zmianę pewności
+OCR_TARGET_DPI = 300  # Rozdzielczość, do której zmniejszane są skany o wyższym DPI przed pomiarem tekstu
+OCR_TARGET_LINE_HEIGHT = 40  # Docelowa wysokość linii tekstu w pikselach (wielkie litery ok. 30 px)
+OCR_RESCALE_TOLERANCE = 1.25  # Obraz nie jest skalowany, gdy wymagana skala mieści się w [1/t, t]
+OCR_RESCALE_LIMITS = (0.2, 4.0)  # Najmniejsza i największa dopuszczalna skala
+OCR_DESKEW_MAX_ANGLE = 10.0  # Zakres szukanego kąta pochylenia (stopnie, w obie strony)
+OCR_DESKEW_MIN_ANGLE = 0.2  # Mniejsze pochylenie jest pomijane
+OCR_DESKEW_WORK_WIDTH = 1200  # Szerokość pomniejszonej kopii używanej do wyznaczenia kąta
+OCR_THRESHOLD_WINDOW = 41  # Rozmiar okna progowania adaptacyjnego (piksele, nieparzysty)
+OCR_THRESHOLD_OFFSET = 10  # Piksel jest tuszem, gdy jest ciemniejszy od średniej okna o co najmniej tyle
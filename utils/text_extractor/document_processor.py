@@ -1,18 +1,31 @@
 import os
 import glob
 from datetime import datetime
-from utils.text_extractor.extractors.pdf_extractor import extract_text_from_pdf
+from utils.text_extractor.extractors.pdf_extractor import PagePool, extract_text_from_pdf, stream_pdf_to_file
 from utils.text_extractor.extractors.docx_extractor import extract_text_from_docx
 from utils.text_extractor.extractors.image_extractor import extract_text_from_image
 from utils.text_extractor.language_detector import detect_language
 from utils.text_extractor.report_generator import generate_text_report
+from utils.text_extractor.parallel import process_files_parallel
+from utils.text_extractor.config import (
+    EXTRACTION_WORKERS,
+    PDF_PAGE_WORKERS,
+    OCR_PREPROCESS_STEPS,
+    OCR_PREPROCESS_COMPARE,
+)
 import csv
 
 class DocumentProcessor:
-    def __init__(self, output_dir="output", generate_report=True):
+    def __init__(self, output_dir="output", generate_report=True, pdf_workers=PDF_PAGE_WORKERS, on_progress=None,
+                 ocr_preprocess=OCR_PREPROCESS_STEPS, ocr_compare=OCR_PREPROCESS_COMPARE):
         self.output_dir = output_dir
         self.generate_report = generate_report
+        self.pdf_workers = pdf_workers
+        self.on_progress = on_progress  # (plik, przetworzone strony, liczba stron)
+        self.ocr_preprocess = tuple(ocr_preprocess or ())  # Kroki przetwarzania obrazów przed OCR dla tej partii
+        self.ocr_compare = ocr_compare  # Dodatkowy OCR surowych obrazów do porównania czasu i pewności
         self.processed_files = []
+        self._page_pool = None  # Pula procesów stron PDF na czas `process_files` (patrz PagePool)
 
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
@@ -34,6 +47,29 @@ class DocumentProcessor:
             print(f"Błąd podczas przetwarzania pliku PDF {file_path}: {e}")
             return ""
 
+    def process_pdf_to_file(self, file_path, output_path):
+        """
+        Zapisuje tekst PDF bezpośrednio do pliku wyjściowego, strona po stronie (patrz `stream_pdf_to_file`).
+        """
+        try:
+            progress = None
+            if self.on_progress is not None:
+                progress = lambda done, total: self.on_progress(file_path, done, total)
+            word_count, language_sample = stream_pdf_to_file(file_path, output_path, self.pdf_workers, progress,
+                                                             self._page_pool)
+            self.processed_files.append({
+                "file_name": os.path.basename(file_path),
+                "file_type": "PDF",
+                "extraction_method": "pdfplumber",
+                "word_count": word_count,
+                "language": detect_language(language_sample),
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+            if word_count:
+                print(f"Zapisano tekst do pliku: {output_path}")
+        except Exception as e:
+            print(f"Błąd podczas przetwarzania pliku PDF {file_path}: {e}")
+
     def process_docx(self, file_path):
         try:
             text = extract_text_from_docx(file_path)
@@ -53,7 +89,9 @@ class DocumentProcessor:
 
     def process_image(self, file_path):
         try:
-            text, detected_lang = extract_text_from_image(file_path)
+            stats = {}
+            text, detected_lang = extract_text_from_image(file_path, preprocess=self.ocr_preprocess, stats=stats,
+                                                          compare=self.ocr_compare)
             word_count = len(text.split())
             self.processed_files.append({
                 "file_name": os.path.basename(file_path),
@@ -62,8 +100,20 @@ class DocumentProcessor:
                 "word_count": word_count,
                 "language": detect_language(text),
                 "ocr_language": detected_lang,
+                "ocr_preprocess": "+".join(self.ocr_preprocess) or "brak",
+                "ocr_preprocess_s": round(stats["preprocess_s"], 3),
+                "ocr_s": round(stats["ocr_s"], 3),
+                "ocr_confidence": round(stats["confidence"], 1),
+                **({
+                    "raw_ocr_s": round(stats["raw_ocr_s"], 3),
+                    "raw_ocr_confidence": round(stats["raw_confidence"], 1),
+                } if self.ocr_compare else {}),
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             })
+            if self.ocr_compare:
+                print(f"{os.path.basename(file_path)}: OCR {stats['raw_ocr_s']:.2f}s -> "
+                      f"{stats['preprocess_s'] + stats['ocr_s']:.2f}s, pewność "
+                      f"{stats['raw_confidence']:.0f} -> {stats['confidence']:.0f}")
             return text
         except Exception as e:
             print(f"Błąd podczas przetwarzania obrazu {file_path}: {e}")
@@ -74,8 +124,12 @@ class DocumentProcessor:
         Przetwarza pojedynczy plik i zapisuje jego zawartość do pliku wyjściowego.
         """
         file_ext = os.path.splitext(file_path)[1].lower()
+        base_name = os.path.splitext(os.path.basename(file_path))[0]
+        output_path = os.path.join(self.output_dir, f"{base_name}.txt")
+
         if file_ext == '.pdf':
-            text = self.process_pdf(file_path)
+            self.process_pdf_to_file(file_path, output_path)
+            return
         elif file_ext == '.docx':
             text = self.process_docx(file_path)
         elif file_ext in ['.png', '.jpg', '.jpeg', '.tiff', '.tif', '.bmp']:
@@ -85,13 +139,36 @@ class DocumentProcessor:
             return ""
 
         if text:
-            base_name = os.path.splitext(os.path.basename(file_path))[0]
-            output_path = os.path.join(self.output_dir, f"{base_name}.txt")
             with open(output_path, 'w', encoding='utf-8') as f:
                 f.write(text)
             print(f"Zapisano tekst do pliku: {output_path}")
 
-    def process_batch(self, file_pattern):
+    def process_files(self, file_paths, workers=EXTRACTION_WORKERS):
+        """
+        Przetwarza listę plików; przy `workers` > 1 równolegle w puli procesów.
+
+        Wpisy do raportu są dodawane do `processed_files` w kolejności wejściowej,
+        niezależnie od kolejności zakończenia pracy procesów.
+        """
+        file_paths = list(file_paths)
+        if workers <= 1 or len(file_paths) <= 1:
+            # Kolejne duże pliki PDF korzystają z jednej puli procesów stron zamiast uruchamiać własną
+            self._page_pool = PagePool(self.pdf_workers) if self.pdf_workers > 1 else None
+            try:
+                for file_path in file_paths:
+                    print(f"Przetwarzanie pliku: {file_path}")
+                    self.process_file(file_path)
+            finally:
+                if self._page_pool is not None:
+                    self._page_pool.close()
+                    self._page_pool = None
+            return
+
+        options = {"ocr_preprocess": self.ocr_preprocess, "ocr_compare": self.ocr_compare}
+        for records in process_files_parallel(file_paths, self.output_dir, min(workers, len(file_paths)), options):
+            self.processed_files.extend(records)
+
+    def process_batch(self, file_pattern, workers=EXTRACTION_WORKERS):
         """
         Przetwarza wiele plików jednocześnie.
         """
@@ -100,9 +177,7 @@ class DocumentProcessor:
             print(f"Nie znaleziono plików pasujących do wzorca: {file_pattern}")
             return
 
-        for file_path in files:
-            print(f"Przetwarzanie pliku: {file_path}")
-            self.process_file(file_path)
+        self.process_files(files, workers)
 
     def generate_report_file(self):
         """
@@ -119,8 +194,9 @@ class DocumentProcessor:
 
         report_csv_path = os.path.join(self.output_dir, "processing_report.csv")
         with open(report_csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = self.processed_files[0].keys()
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            # Wpisy obrazów mają dodatkowe kolumny OCR, więc nagłówek to suma kluczy wszystkich wpisów
+            fieldnames = list(dict.fromkeys(key for file_info in self.processed_files for key in file_info))
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, restval="")
 
             writer.writeheader()
             for file_info in self.processed_files:
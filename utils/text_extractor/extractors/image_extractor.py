@@ -1,11 +1,87 @@
-import pytesseract
+import time
 from PIL import Image
+from utils.text_extractor.extractors.ocr_preprocessing import preprocess_for_ocr
+from utils.text_extractor.extractors.ocr_service import get_ocr_service
+from utils.text_extractor.language_detector import detect_language
+from utils.text_extractor.config import (
+    OCR_LANGUAGES,
+    OCR_DEFAULT_LANGUAGE,
+    OCR_LANGUAGE_STRATEGY,
+    OCR_TRIAL_CROP,
+    OCR_PREPROCESS_STEPS,
+)
+
+OCR_STRATEGIES = ("combined", "trial", "both")
+POLISH_CHARACTERS = set("ąćęłńóśźżĄĆĘŁŃÓŚŹŻ")
+
+
+def ocr_language_of(text):
+    """
+    Wybiera język Tesseract (np. "pol") pasujący do rozpoznanego tekstu.
+    """
+    detected = detect_language(text)
+    for ocr_language, code in OCR_LANGUAGES.items():
+        if code == detected:
+            return ocr_language
+    if "pol" in OCR_LANGUAGES and POLISH_CHARACTERS.intersection(text):
+        return "pol"
+    return OCR_DEFAULT_LANGUAGE
+
+def _trial_crop(image):
+    band = max(1, int(image.height * OCR_TRIAL_CROP))
+    top = (image.height - band) // 2
+    return image.crop((0, top, image.width, top + band))
+
+def _longest(image, languages):
+    # Przy równej długości wygrywa język późniejszy na liście (jak dotychczas "pol" przed "eng")
+    best = None
+    for language in languages:
+        text, confidence = get_ocr_service().recognize(image, lang=language)
+        if best is None or len(text) >= len(best[0]):
+            best = (text, language, confidence)
+    return best
+
+def _recognize(image, strategy):
+    languages = list(OCR_LANGUAGES)
+    if strategy == "combined":
+        text, confidence = get_ocr_service().recognize(image, lang="+".join(languages))
+        return text, ocr_language_of(text), confidence
+    if strategy == "trial":
+        _, language, _ = _longest(_trial_crop(image), languages)
+        text, confidence = get_ocr_service().recognize(image, lang=language)
+        return text, language, confidence
+    return _longest(image, languages)
+
+def extract_text_from_image(file_path, strategy=OCR_LANGUAGE_STRATEGY, preprocess=OCR_PREPROCESS_STEPS,
+                            stats=None, compare=False):
+    """
+    Rozpoznaje tekst na obrazie i zwraca parę (tekst, język OCR).
+
+    Strategia "combined" wykonuje jeden przebieg OCR ze wszystkimi językami naraz,
+    "trial" - tanią próbę na pasie obrazu, a następnie jeden przebieg w wybranym języku,
+    "both" - pełny przebieg w każdym języku (patrz `OCR_LANGUAGE_STRATEGY`).
+
+    Args:
+        preprocess (tuple): Kroki `preprocess_for_ocr` wykonywane przed OCR (pusta krotka - obraz bez zmian).
+        stats (dict): Opcjonalny słownik uzupełniany pomiarami: `preprocess_s`, `ocr_s` i `confidence`
+            (średnia pewność słów 0-100); przy `compare` także `raw_ocr_s` i `raw_confidence`
+            dla OCR obrazu bez przetwarzania.
+    """
+    if strategy not in OCR_STRATEGIES:
+        raise ValueError(f"Nieznana strategia OCR: {strategy}. Dostępne: {', '.join(OCR_STRATEGIES)}.")
 
-def extract_text_from_image(file_path):
     image = Image.open(file_path)
-    text_eng = pytesseract.image_to_string(image, lang='eng')
-    text_pol = pytesseract.image_to_string(image, lang='pol')
-    if len(text_eng) > len(text_pol):
-        return text_eng, "eng"
-    else:
-        return text_pol, "pol"
\ No newline at end of file
+    image.load()
+    start = time.perf_counter()
+    prepared = preprocess_for_ocr(image, preprocess) if preprocess else image
+    preprocess_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    text, language, confidence = _recognize(prepared, strategy)
+    if stats is not None:
+        stats.update(preprocess_s=preprocess_s, ocr_s=time.perf_counter() - start, confidence=confidence)
+        if compare:
+            start = time.perf_counter()
+            _, _, raw_confidence = _recognize(image, strategy)
+            stats.update(raw_ocr_s=time.perf_counter() - start, raw_confidence=raw_confidence)
+    return text, language
@@ -0,0 +1,185 @@
+import math
+import numpy as np
+from PIL import Image, ImageOps
+from utils.text_extractor.config import (
+    OCR_PREPROCESS_STEPS,
+    OCR_TARGET_DPI,
+    OCR_TARGET_LINE_HEIGHT,
+    OCR_RESCALE_TOLERANCE,
+    OCR_RESCALE_LIMITS,
+    OCR_DESKEW_MAX_ANGLE,
+    OCR_DESKEW_MIN_ANGLE,
+    OCR_DESKEW_WORK_WIDTH,
+    OCR_THRESHOLD_WINDOW,
+    OCR_THRESHOLD_OFFSET,
+)
+
+PREPROCESS_STEPS = ("deskew", "rescale", "binarize")
+DESKEW_MAX_POINTS = 200000  # Liczba pikseli tuszu branych pod uwagę przy wyznaczaniu kąta
+MIN_LINE_HEIGHT = 4  # Krótsze serie wierszy traktowane są jako szum
+MIN_LINES = 3
+LINE_INK_FRACTION = 0.005
+
+
+def _slice(axis, start, stop):
+    return (slice(None),) * axis + (slice(start, stop),)
+
+def _window_sums(values, window, axis):
+    # Sumy w przesuwnym oknie z sum skumulowanych; int32 wystarcza przy sumowaniu osobno po osiach
+    cumulative = np.cumsum(values, axis=axis, dtype=np.int32)
+    length = cumulative.shape[axis] - window + 1
+    sums = cumulative[_slice(axis, window - 1, None)].copy()
+    sums[_slice(axis, 1, length)] -= cumulative[_slice(axis, 0, length - 1)]
+    return sums
+
+def adaptive_threshold(gray, window=OCR_THRESHOLD_WINDOW, offset=OCR_THRESHOLD_OFFSET):
+    """
+    Progowanie adaptacyjne (średnia lokalna): piksel jest tuszem, gdy jest ciemniejszy
+    od średniej okna `window` x `window` o co najmniej `offset` poziomów jasności.
+    Izolowane plamki szumu są usuwane.
+
+    Próg zależy od otoczenia, więc nierównomierne oświetlenie zdjęć nie zamienia dużych
+    obszarów w plamy, a jednolite tło z szumem pozostaje białe.
+
+    Returns:
+        numpy.ndarray: Maska bool (True - tusz) o wymiarach obrazu.
+    """
+    window = max(3, window | 1)
+    radius = window // 2
+    padded = np.pad(gray, radius, mode="edge")
+    sums = _window_sums(_window_sums(padded, window, axis=1), window, axis=0)
+    # Piksel porównywany jest jako średnia 3 x 3, co tłumi szum matrycy zdjęć
+    pixels = _window_sums(_window_sums(padded[radius - 1:-radius + 1, radius - 1:-radius + 1], 3, axis=1), 3, axis=0)
+    area = window * window
+    ink = pixels.astype(np.int64) * area < (sums - offset * area).astype(np.int64) * 9
+
+    # Pojedyncze plamki (najwyżej 2 piksele tuszu w otoczeniu 3 x 3) usuwamy
+    neighbours = _window_sums(_window_sums(np.pad(ink, 1).view(np.uint8), 3, axis=1), 3, axis=0)
+    return ink & (neighbours > 2)
+
+def estimate_line_height(ink, strips=8):
+    """
+    Mediana wysokości linii tekstu na podstawie poziomego profilu projekcji maski tuszu.
+
+    Profil liczony jest osobno w pionowych pasach obrazu, aby linie sąsiednich kolumn
+    tekstu nie zlewały się ze sobą. Zwraca None, gdy nie znaleziono wystarczająco wielu linii.
+    """
+    height, width = ink.shape
+    strip_width = max(1, width // strips)
+    usable = strip_width * (width // strip_width)
+    # Wiersz należy do linii tekstu, gdy ma w pasie więcej niż kilka pikseli tuszu; próg jest niski,
+    # aby wiersze z samymi wydłużeniami liter (b, d, p) nie dzieliły linii na części
+    rows = ink[:, :usable].reshape(height, -1, strip_width).sum(axis=2) > max(2, strip_width * LINE_INK_FRACTION)
+
+    edges = np.diff(np.pad(rows, ((1, 1), (0, 0))).astype(np.int8), axis=0).T
+    runs = np.nonzero(edges == -1)[1] - np.nonzero(edges == 1)[1]
+    runs = runs[runs >= MIN_LINE_HEIGHT]
+    if len(runs) < MIN_LINES:
+        return None
+    return float(np.median(runs))
+
+def estimate_skew(gray, max_angle=OCR_DESKEW_MAX_ANGLE):
+    """
+    Wyznacza kąt pochylenia tekstu (stopnie) metodą profilu projekcji.
+
+    Kąt wybierany jest tak, aby rzut pikseli tuszu wzdłuż linii o tym nachyleniu dawał
+    najbardziej "ostry" profil (największa suma kwadratów). Obliczenia wykonywane są na
+    pomniejszonej kopii: najpierw co 0,5°, potem co 0,05° wokół najlepszego kąta.
+    """
+    factor = math.ceil(gray.width / OCR_DESKEW_WORK_WIDTH)
+    work = gray.reduce(factor) if factor > 1 else gray
+    ys, xs = np.nonzero(adaptive_threshold(np.asarray(work)))
+    if len(ys) < MIN_LINES:
+        return 0.0
+    step = math.ceil(len(ys) / DESKEW_MAX_POINTS)
+    ys = ys[::step].astype(np.float32)
+    xs = xs[::step].astype(np.float32)
+    shift = math.ceil(work.width * math.tan(math.radians(max_angle))) + 1
+
+    def score(angle):
+        rows = np.rint(ys - xs * math.tan(math.radians(angle))).astype(np.int64) + shift
+        counts = np.bincount(rows).astype(np.float64)
+        return float(np.dot(counts, counts))
+
+    # Kandydaci poza [-max_angle, max_angle] dawaliby ujemne wiersze (patrz `shift`)
+    best = max(np.clip(np.arange(-max_angle, max_angle + 0.25, 0.5), -max_angle, max_angle), key=score)
+    return float(max(np.clip(np.arange(best - 0.5, best + 0.525, 0.05), -max_angle, max_angle), key=score))
+
+def _image_dpi(image):
+    dpi = image.info.get("dpi")
+    if not dpi:
+        return None
+    value = float(dpi[0] if isinstance(dpi, tuple) else dpi)
+    return value if value > 1 else None
+
+def _grayscale(image):
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        # Przezroczyste tło jako białe, a nie czarne
+        image = image.convert("RGBA")
+        background = Image.new("RGBA", image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image)
+    return image.convert("L")
+
+def _text_height_scale(ink, dpi):
+    line_height = estimate_line_height(ink)
+    if line_height is not None:
+        scale = OCR_TARGET_LINE_HEIGHT / line_height
+    elif dpi is not None:
+        # Bez zmierzonych linii zaufamy tylko wysokiemu DPI - niskie wartości (np. 72 w zdjęciach) bywają umowne
+        scale = min(1.0, OCR_TARGET_DPI / dpi)
+    else:
+        return 1.0
+
+    low, high = OCR_RESCALE_LIMITS
+    scale = min(max(scale, low), high)
+    if 1 / OCR_RESCALE_TOLERANCE <= scale <= OCR_RESCALE_TOLERANCE:
+        return 1.0
+    return scale
+
+def preprocess_for_ocr(image, steps=OCR_PREPROCESS_STEPS):
+    """
+    Przygotowuje obraz do OCR i zwraca obraz w skali szarości (tryb "L").
+
+    Kroki (w tej kolejności, pomijane, gdy nie ma ich w `steps`):
+    - skany o DPI wyraźnie wyższym niż `OCR_TARGET_DPI` są najpierw tanio pomniejszane
+      o całkowity współczynnik (krok "rescale"),
+    - "deskew" - obrót o kąt wyznaczony przez `estimate_skew`,
+    - "rescale" - skalowanie tak, aby linie tekstu miały ok. `OCR_TARGET_LINE_HEIGHT` pikseli
+      (bez zmierzonych linii - do `OCR_TARGET_DPI` na podstawie DPI obrazu),
+    - "binarize" - czarno-biały obraz z `adaptive_threshold`.
+    """
+    unknown = set(steps) - set(PREPROCESS_STEPS)
+    if unknown:
+        raise ValueError(f"Nieznane kroki przetwarzania: {', '.join(sorted(unknown))}. "
+                         f"Dostępne: {', '.join(PREPROCESS_STEPS)}.")
+
+    dpi = _image_dpi(image)
+    gray = _grayscale(image)
+
+    if "rescale" in steps and dpi is not None and dpi > OCR_TARGET_DPI * OCR_RESCALE_TOLERANCE:
+        factor = int(dpi // OCR_TARGET_DPI)
+        gray = gray.reduce(factor)
+        dpi /= factor
+
+    if "deskew" in steps:
+        angle = estimate_skew(gray)
+        if abs(angle) >= OCR_DESKEW_MIN_ANGLE:
+            # Narożniki po obrocie w kolorze tła, aby ich krawędzie nie wyglądały jak tusz
+            background = int(np.median(np.asarray(gray)[::8, ::8]))
+            gray = gray.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=background)
+
+    ink = None
+    if "rescale" in steps:
+        ink = adaptive_threshold(np.asarray(gray))
+        scale = _text_height_scale(ink, dpi)
+        if scale != 1.0:
+            size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+            gray = gray.resize(size, Image.LANCZOS if scale < 1 else Image.BICUBIC)
+            ink = None
+
+    if "binarize" in steps:
+        if ink is None:
+            ink = adaptive_threshold(np.asarray(gray))
+        gray = Image.fromarray(np.where(ink, 0, 255).astype(np.uint8))
+    return gray
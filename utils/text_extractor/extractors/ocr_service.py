@@ -0,0 +1,177 @@
+import atexit
+import io
+import threading
+from PIL import Image
+from utils.text_extractor.config import OCR_ENGINE, OCR_POOL_SIZE, OCR_TESSDATA_PATH
+
+OCR_ENGINES = ("auto", "tesserocr", "pytesseract")
+
+
+def _load_image(image):
+    # Obrazy przekazywane są w pamięci: jako obiekt PIL albo bajty pliku
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = Image.open(io.BytesIO(image))
+    return image
+
+def _mean_tsv_confidence(data):
+    # Kolumna "conf" wyniku TSV; -1 mają wiersze bloków, akapitów i linii, a nie słów
+    confidences = []
+    for row in data.splitlines()[1:]:
+        columns = row.split("\t")
+        if len(columns) >= 12 and columns[11].strip() and float(columns[10]) >= 0:
+            confidences.append(float(columns[10]))
+    return sum(confidences) / len(confidences) if confidences else 0.0
+
+
+class OcrService:
+    """
+    Warstwa OCR z pulą długo żyjących silników Tesseract.
+
+    Przy dostępnym pakiecie tesserocr każdy silnik to załadowany w procesie `PyTessBaseAPI`
+    z danymi języka wczytanymi raz, a obraz trafia do niego bezpośrednio z pamięci - bez
+    uruchamiania procesu `tesseract` i plików tymczasowych przy każdym wywołaniu. Silniki
+    tworzone są leniwie, łącznie (dla wszystkich kombinacji języków) co najwyżej `pool_size`;
+    przy osiągniętym limicie wolny silnik innej kombinacji języków jest zamykany, a gdy
+    wszystkie są zajęte, wątki czekają na zwolnienie. Bez tesserocr używany jest
+    pytesseract (proces na wywołanie).
+    """
+
+    def __init__(self, engine=OCR_ENGINE, pool_size=OCR_POOL_SIZE, tessdata_path=OCR_TESSDATA_PATH):
+        if engine not in OCR_ENGINES:
+            raise ValueError(f"Nieznany silnik OCR: {engine}. Dostępne: {', '.join(OCR_ENGINES)}.")
+        self.pool_size = max(1, pool_size)
+        self.tessdata_path = tessdata_path
+        self.engine = self._resolve_engine(engine)
+
+        self._condition = threading.Condition()
+        self._idle = {}  # język -> lista wolnych silników
+        self._created = 0  # liczba istniejących silników (wolnych i zajętych)
+        self._closed = False
+
+    @staticmethod
+    def _resolve_engine(engine):
+        if engine == "pytesseract":
+            return engine
+        try:
+            import tesserocr  # noqa: F401
+            return "tesserocr"
+        except ImportError:
+            if engine == "tesserocr":
+                raise ImportError("Silnik OCR 'tesserocr' wymaga pakietu tesserocr (pip install tesserocr).")
+            print("Uwaga: brak pakietu tesserocr - OCR używa pytesseract (osobny proces tesseract dla każdego "
+                  "obrazu, znacznie wolniej). Zainstaluj tesserocr (pip install tesserocr) lub ustaw "
+                  "OCR_ENGINE=pytesseract, aby wyłączyć to ostrzeżenie.")
+            return "pytesseract"
+
+    def _create_api(self, lang):
+        import tesserocr
+
+        if self.tessdata_path:
+            return tesserocr.PyTessBaseAPI(path=self.tessdata_path, lang=lang)
+        return tesserocr.PyTessBaseAPI(lang=lang)
+
+    def _acquire(self, lang):
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Usługa OCR została zamknięta.")
+                idle = self._idle.get(lang)
+                if idle:
+                    return idle.pop()
+                if self._created < self.pool_size:
+                    self._created += 1
+                    break
+                # Limit silników osiągnięty - zwalniamy miejsce, zamykając wolny silnik innych języków
+                other = next((engines for engines in self._idle.values() if engines), None)
+                if other is not None:
+                    other.pop().End()
+                    self._created -= 1
+                    continue
+                self._condition.wait()
+
+        try:
+            return self._create_api(lang)
+        except Exception:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, lang, api):
+        with self._condition:
+            if self._closed:
+                # Silnik był zajęty podczas `close` - zamykamy go teraz
+                api.End()
+                self._created -= 1
+                return
+            self._idle.setdefault(lang, []).append(api)
+            self._condition.notify()
+
+    def image_to_string(self, image, lang):
+        """
+        Rozpoznaje tekst na obrazie (PIL lub bajty pliku) w podanych językach (np. "eng+pol").
+        """
+        image = _load_image(image)
+        if self.engine == "pytesseract":
+            import pytesseract
+
+            return pytesseract.image_to_string(image, lang=lang)
+
+        api = self._acquire(lang)
+        try:
+            api.SetImage(image)
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            self._release(lang, api)
+
+    def recognize(self, image, lang):
+        """
+        Jak `image_to_string`, ale zwraca parę (tekst, średnia pewność rozpoznania słów 0-100).
+        """
+        image = _load_image(image)
+        if self.engine == "pytesseract":
+            import pytesseract
+
+            text, data = pytesseract.run_and_get_multiple_output(image, extensions=["txt", "tsv"], lang=lang)
+            return text, _mean_tsv_confidence(data)
+
+        api = self._acquire(lang)
+        try:
+            api.SetImage(image)
+            text = api.GetUTF8Text()
+            # Bez rozpoznanych słów MeanTextConf nie jest miarodajne
+            return text, float(api.MeanTextConf()) if text.strip() else 0.0
+        finally:
+            api.Clear()
+            self._release(lang, api)
+
+    def close(self):
+        """
+        Zamyka wolne silniki; silniki w użyciu zamykane są przy zwolnieniu.
+        """
+        with self._condition:
+            self._closed = True
+            for engines in self._idle.values():
+                for api in engines:
+                    api.End()
+                    self._created -= 1
+            self._idle.clear()
+            self._condition.notify_all()
+
+
+_ocr_service = None
+_ocr_service_lock = threading.Lock()
+
+
+def get_ocr_service():
+    """
+    Zwraca wspólną usługę OCR procesu, tworząc ją przy pierwszym użyciu - import modułu
+    (np. w procesach roboczych spawn, które nie wykonują OCR) nie wybiera silnika.
+    """
+    global _ocr_service
+    with _ocr_service_lock:
+        if _ocr_service is None:
+            _ocr_service = OcrService()
+            atexit.register(_ocr_service.close)
+        return _ocr_service
@@ -1,8 +1,156 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import pdfplumber
+from utils.text_extractor.config import (
+    PDF_PAGE_WORKERS,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_PAGES_PER_TASK,
+    PDF_LANGUAGE_SAMPLE_CHARS,
+)
 
 def extract_text_from_pdf(file_path):
-    text = ""
+    parts = []
     with pdfplumber.open(file_path) as pdf:
         for page in pdf.pages:
-            text += page.extract_text() or ""
-    return text
\ No newline at end of file
+            parts.append(page.extract_text() or "")
+            page.flush_cache()
+    return "".join(parts)
+
+def count_pdf_pages(file_path):
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+def _extract_page_range(file_path, first_page, last_page):
+    # Numery stron pdfplumber liczone są od 1; tworzone są tylko obiekty stron z zakresu
+    texts = []
+    with pdfplumber.open(file_path, pages=range(first_page, last_page + 1)) as pdf:
+        for page in pdf.pages:
+            texts.append(page.extract_text() or "")
+            page.flush_cache()
+    return texts
+
+def _iter_pages_sequential(file_path, first_page=1):
+    with pdfplumber.open(file_path) as pdf:
+        total = len(pdf.pages)
+        for page in pdf.pages[first_page - 1:]:
+            yield page.extract_text() or "", total
+            page.flush_cache()
+
+class PagePool:
+    """
+    Pula procesów spawn do ekstrakcji zakresów stron PDF, współdzielona przez kolejne
+    dokumenty partii - uruchomienie procesów (import pdfplumber) trwa dłużej niż
+    przetworzenie wielu stron. Procesy tworzone są przy pierwszym zleceniu;
+    po awarii procesu roboczego (`discard`) kolejne zlecenie tworzy nową pulę.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = None
+
+    def submit(self, fn, *args):
+        if self._executor is None:
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._executor.submit(fn, *args)
+
+    def discard(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _iter_pages_parallel(file_path, total, pool):
+    # Zakresy stron przetwarzane są równolegle, ale oddawane w kolejności; zlecanych jest
+    # naraz co najwyżej 2 * workers zakresów, więc w pamięci nie czeka cały dokument
+    # Awaria procesu roboczego nie przerywa dokumentu: pozostałe strony czytane są w tym procesie
+    ranges = [(first, min(first + PDF_PAGES_PER_TASK - 1, total)) for first in range(1, total + 1, PDF_PAGES_PER_TASK)]
+    futures = {}
+    try:
+        for position in range(len(ranges)):
+            for index in range(position, min(position + 2 * pool.workers, len(ranges))):
+                if index not in futures:
+                    futures[index] = pool.submit(_extract_page_range, file_path, *ranges[index])
+            try:
+                texts = futures.pop(position).result()
+            except BrokenProcessPool:
+                print(f"Proces roboczy ekstrakcji PDF zakończył się awaryjnie - strony od {ranges[position][0]} "
+                      f"pliku {file_path} są przetwarzane w jednym procesie.")
+                pool.discard()
+                break
+            for text in texts:
+                yield text, total
+        else:
+            return
+    finally:
+        # Pula może służyć kolejnym dokumentom, więc nie zostawiamy w niej zleceń tego pliku
+        for future in futures.values():
+            future.cancel()
+    yield from _iter_pages_sequential(file_path, ranges[position][0])
+
+def stream_pdf_to_file(file_path, output_path, workers=PDF_PAGE_WORKERS, on_progress=None, pool=None):
+    """
+    Zapisuje tekst PDF do pliku strona po stronie, bez budowania całego tekstu w pamięci.
+
+    Dokumenty mające co najmniej `PDF_PARALLEL_MIN_PAGES` stron są dzielone na zakresy po
+    `PDF_PAGES_PER_TASK` stron przetwarzane równolegle w `workers` procesach; tekst trafia
+    do pliku zawsze w kolejności stron. Strony rozdzielane są znakiem nowej linii.
+    Plik wynikowy jest tworzony tylko wtedy, gdy dokument zawiera jakiekolwiek słowa.
+
+    Args:
+        on_progress: Opcjonalna funkcja (przetworzone strony, liczba stron) wywoływana po każdej stronie.
+        pool (PagePool): Pula procesów współdzielona przez dokumenty partii (zastępuje `workers`);
+            bez niej dla dużego dokumentu tworzona jest pula zamykana po jego przetworzeniu.
+
+    Returns:
+        tuple: (liczba słów, początek tekstu do rozpoznania języka - do `PDF_LANGUAGE_SAMPLE_CHARS` znaków).
+    """
+    total = count_pdf_pages(file_path)
+    own_pool = None
+    if pool is None and workers > 1 and total >= PDF_PARALLEL_MIN_PAGES:
+        pool = own_pool = PagePool(min(workers, -(-total // PDF_PAGES_PER_TASK)))
+    if pool is not None and pool.workers > 1 and total >= PDF_PARALLEL_MIN_PAGES:
+        pages = _iter_pages_parallel(file_path, total, pool)
+    else:
+        pages = _iter_pages_sequential(file_path)
+
+    temp_path = f"{output_path}.part"
+    word_count = 0
+    sample = []
+    sample_length = 0
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for page_number, (text, total) in enumerate(pages, 1):
+                if page_number > 1:
+                    f.write("\n")
+                f.write(text)
+                word_count += len(text.split())
+                if sample_length < PDF_LANGUAGE_SAMPLE_CHARS:
+                    sample.append(text[:PDF_LANGUAGE_SAMPLE_CHARS - sample_length])
+                    sample_length += len(sample[-1])
+                if on_progress is not None:
+                    on_progress(page_number, total)
+
+        if word_count:
+            os.replace(temp_path, output_path)
+    finally:
+        pages.close()
+        if own_pool is not None:
+            own_pool.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return word_count, "\n".join(sample)
@@ -0,0 +1,77 @@
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from utils.text_extractor.config import EXTRACTION_IN_FLIGHT_PER_WORKER
+
+
+def _process_in_worker(output_dir, file_path, options):
+    from utils.text_extractor.document_processor import DocumentProcessor
+
+    print(f"Przetwarzanie pliku: {file_path}")
+    # Pliki są już przetwarzane równolegle, więc strony PDF nie dostają własnej puli procesów
+    processor = DocumentProcessor(output_dir=output_dir, generate_report=False, pdf_workers=1, **options)
+    processor.process_file(file_path)
+    return processor.processed_files
+
+def _run_isolated(context, output_dir, file_path, options):
+    # Plik podejrzany o awarię procesu przetwarzamy w osobnym, jednorazowym procesie
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        try:
+            return executor.submit(_process_in_worker, output_dir, file_path, options).result()
+        except BrokenProcessPool:
+            print(f"Proces przetwarzający plik {file_path} zakończył się awaryjnie - plik pominięto.")
+        except Exception as e:
+            print(f"Błąd podczas przetwarzania pliku {file_path}: {e}")
+    return []
+
+def process_files_parallel(file_paths, output_dir, workers, options=None):
+    """
+    Przetwarza pliki w puli `workers` procesów; każdy proces zapisuje tekst do `output_dir`.
+    `options` to dodatkowe argumenty `DocumentProcessor` w procesach (np. ustawienia OCR partii).
+
+    Do puli trafia naraz co najwyżej `workers * EXTRACTION_IN_FLIGHT_PER_WORKER` plików.
+    Gdy proces roboczy ulegnie awarii (np. błąd biblioteki natywnej), pula jest tworzona
+    od nowa, a pliki, które były wtedy w toku, przetwarzane są pojedynczo w osobnych
+    procesach - awaria jednego pliku nie przerywa całej partii.
+
+    Returns:
+        list: Dla każdego pliku (w kolejności wejściowej) lista wpisów do raportu
+        (pusta, gdy pliku nie udało się przetworzyć).
+    """
+    options = options or {}
+    context = multiprocessing.get_context("spawn")
+    results = [[] for _ in file_paths]
+    pending = deque(range(len(file_paths)))
+    suspects = []
+    max_in_flight = max(1, workers * EXTRACTION_IN_FLIGHT_PER_WORKER)
+
+    while pending:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        in_flight = {}
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < max_in_flight:
+                    index = pending.popleft()
+                    in_flight[executor.submit(_process_in_worker, output_dir, file_paths[index], options)] = index
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                broken = False
+                for future in done:
+                    index = in_flight.pop(future)
+                    try:
+                        results[index] = future.result()
+                    except BrokenProcessPool:
+                        suspects.append(index)
+                        broken = True
+                    except Exception as e:
+                        print(f"Błąd podczas przetwarzania pliku {file_paths[index]}: {e}")
+                if broken:
+                    suspects.extend(in_flight.values())
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    for index in sorted(suspects):
+        results[index] = _run_isolated(context, output_dir, file_paths[index], options)
+    return results
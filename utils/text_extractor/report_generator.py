@@ -1,6 +1,34 @@
 from datetime import datetime
 from collections import Counter
 
+def _ocr_summary(ocr_files):
+    if not ocr_files:
+        return ""
+
+    preprocess_s = sum(file_info['ocr_preprocess_s'] for file_info in ocr_files)
+    ocr_s = sum(file_info['ocr_s'] for file_info in ocr_files)
+    confidence = sum(file_info['ocr_confidence'] for file_info in ocr_files) / len(ocr_files)
+    steps = Counter(file_info['ocr_preprocess'] for file_info in ocr_files)
+
+    summary = "\nOCR:\n"
+    summary += f"  - Przetwarzanie wstępne: {', '.join(steps)}\n"
+    summary += f"  - Czas przetwarzania wstępnego: {preprocess_s:.2f} s, czas OCR: {ocr_s:.2f} s\n"
+    summary += f"  - Średnia pewność OCR: {confidence:.1f}\n"
+
+    compared = [file_info for file_info in ocr_files if 'raw_ocr_s' in file_info]
+    if compared:
+        raw_s = sum(file_info['raw_ocr_s'] for file_info in compared)
+        processed_s = sum(file_info['ocr_preprocess_s'] + file_info['ocr_s'] for file_info in compared)
+        raw_confidence = sum(file_info['raw_ocr_confidence'] for file_info in compared) / len(compared)
+        processed_confidence = sum(file_info['ocr_confidence'] for file_info in compared) / len(compared)
+        saved = raw_s - processed_s
+        summary += f"  - Porównanie z OCR bez przetwarzania wstępnego ({len(compared)} obrazów):\n"
+        change = f"zaoszczędzono {saved:.2f} s" if saved >= 0 else f"dłużej o {-saved:.2f} s"
+        summary += f"    czas {raw_s:.2f} s -> {processed_s:.2f} s ({change})\n"
+        summary += f"    średnia pewność {raw_confidence:.1f} -> {processed_confidence:.1f} "
+        summary += f"({processed_confidence - raw_confidence:+.1f})\n"
+    return summary
+
 def generate_text_report(processed_files):
     if not processed_files:
         return "Brak przetworzonych plików."
@@ -27,6 +55,8 @@ def generate_text_report(processed_files):
     for lang, count in languages.items():
         report += f"  - {lang}: {count} plików\n"
 
+    report += _ocr_summary([file_info for file_info in processed_files if 'ocr_confidence' in file_info])
+
     report += "\nSZCZEGÓŁY PRZETWORZONYCH PLIKÓW:\n"
     report += "-" * 50 + "\n"
     for i, file_info in enumerate(processed_files, 1):
@@ -37,6 +67,11 @@ def generate_text_report(processed_files):
         report += f"   Wykryty język: {file_info['language']}\n"
         if 'ocr_language' in file_info:
             report += f"   Język OCR: {file_info['ocr_language']}\n"
+        if 'ocr_confidence' in file_info:
+            report += f"   Pewność OCR: {file_info['ocr_confidence']:.1f}"
+            if 'raw_ocr_confidence' in file_info:
+                report += f" (bez przetwarzania wstępnego: {file_info['raw_ocr_confidence']:.1f})"
+            report += "\n"
         report += f"   Czas przetworzenia: {file_info['timestamp']}\n\n"
 
     return report
\ No newline at end of file